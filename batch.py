@@ -0,0 +1,180 @@
+"""
+Module: Batch
+Description: Plays many independent blackjack tables in lockstep with NumPy. Shoes are integer
+             arrays of card values and every step of a round is an array operation, so one
+             call can cover millions of hands. Requires numpy.
+"""
+
+
+
+import numpy as np
+
+from blackjack_refactor import ACE_DIFF, DEALER_LIMIT, TWENTYONE, VALUES, VAL_DICT, SUITS
+
+
+
+ACE_VALUE = VAL_DICT["A"]
+# One deck as card values, aces counted high like VAL_DICT
+DECK_VALUES = np.array([VAL_DICT[value] for _ in SUITS for value in VALUES], dtype=np.int8)
+WIN = 1
+LOSS = -1
+PUSH = 0
+
+
+
+def max_round_cards(decks=1):
+    # Most cards one round can use: the player and then the dealer each take the smallest
+    # cards left in the shoe until their hard total passes 21. Aces count as 1 here, so
+    # ace-heavy multi-deck shoes get the bigger reserve they need
+    counts = {value: 0 for value in DECK_VALUES.tolist()}
+    for value in DECK_VALUES.tolist():
+        counts[value] += decks
+    # Aces are VAL_DICT 11 but the smallest card when counted hard
+    smallest_first = [ACE_VALUE] + sorted(value for value in counts if value != ACE_VALUE)
+    used = 0
+    for _ in range(2):
+        total = 0
+        for value in smallest_first:
+            hard_value = 1 if value == ACE_VALUE else value
+            while counts[value] and total <= TWENTYONE:
+                counts[value] -= 1
+                total += hard_value
+                used += 1
+    return used
+
+
+
+class BatchHands:
+    def __init__(self, tables):
+        self.value = np.zeros(tables, dtype=np.int16)
+        self.soft_aces = np.zeros(tables, dtype=np.int8)
+        self.cards = np.zeros(tables, dtype=np.int8)
+
+    def add_cards(self, cards, mask):
+        # Only tables in mask take the card; aces drop from 11 to 1 while the hand is over 21
+        cards = np.where(mask, cards, 0)
+        self.value += cards
+        self.soft_aces += cards == ACE_VALUE
+        self.cards += mask
+        over = (self.value > TWENTYONE) & (self.soft_aces > 0)
+        while over.any():
+            self.value -= over * ACE_DIFF
+            self.soft_aces -= over
+            over = (self.value > TWENTYONE) & (self.soft_aces > 0)
+
+    def bust(self):
+        return self.value > TWENTYONE
+
+    def blackjack(self):
+        return (self.value == TWENTYONE) & (self.cards == 2)
+
+
+
+class BatchShoes:
+    def __init__(self, tables, decks=1, rng=None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.rows = np.arange(tables)
+        self.cards = np.tile(np.tile(DECK_VALUES, decks), (tables, 1))
+        self.cursor = np.zeros(tables, dtype=np.int64)
+        self.reshuffles = np.zeros(tables, dtype=np.int64)
+        self.cards = self.rng.permuted(self.cards, axis=1)
+        self.reserve = max_round_cards(decks)
+
+    def shuffle_low(self):
+        # Reshuffle any shoe that might run out mid-round
+        low = self.cursor > self.cards.shape[1] - self.reserve
+        if low.any():
+            self.cards[low] = self.rng.permuted(self.cards[low], axis=1)
+            self.cursor[low] = 0
+            self.reshuffles += low
+
+    def draw(self, mask):
+        if (self.cursor + mask > self.cards.shape[1]).any():
+            raise ValueError("A shoe ran out mid-round, the reshuffle reserve is too small")
+        cards = self.cards[self.rows, np.minimum(self.cursor, self.cards.shape[1] - 1)]
+        self.cursor += mask
+        return cards
+
+
+
+class BatchGame:
+    def __init__(self, tables, decks=1, stand_on=DEALER_LIMIT, seed=None):
+        # Player hits below stand_on, the same rule as MimicDealerStrategy by default
+        self.tables = tables
+        self.stand_on = stand_on
+        self.shoes = BatchShoes(tables, decks, np.random.default_rng(seed))
+        self.wins = np.zeros(tables, dtype=np.int64)
+        self.losses = np.zeros(tables, dtype=np.int64)
+        self.pushes = np.zeros(tables, dtype=np.int64)
+        self.blackjacks = np.zeros(tables, dtype=np.int64)
+        self.net = np.zeros(tables, dtype=np.int64)
+
+    def play_round(self, bet=1):
+        everyone = np.ones(self.tables, dtype=bool)
+        self.shoes.shuffle_low()
+        dealer = BatchHands(self.tables)
+        player = BatchHands(self.tables)
+
+        # Deal order matches Game.start_round: dealer hole card and upcard, then the player
+        dealer.add_cards(self.shoes.draw(everyone), everyone)
+        dealer.add_cards(self.shoes.draw(everyone), everyone)
+        player.add_cards(self.shoes.draw(everyone), everyone)
+        player.add_cards(self.shoes.draw(everyone), everyone)
+
+        # A player blackjack ends the round before anyone draws
+        natural = player.blackjack()
+        hitting = ~natural & (player.value < self.stand_on)
+        while hitting.any():
+            player.add_cards(self.shoes.draw(hitting), hitting)
+            hitting &= player.value < self.stand_on
+
+        drawing = ~natural & ~player.bust() & (dealer.value < DEALER_LIMIT)
+        while drawing.any():
+            dealer.add_cards(self.shoes.draw(drawing), drawing)
+            drawing &= dealer.value < DEALER_LIMIT
+
+        outcome = self.resolve(player, dealer)
+        self.wins += outcome == WIN
+        self.losses += outcome == LOSS
+        self.pushes += outcome == PUSH
+        self.blackjacks += natural
+        self.net += outcome * bet
+        return outcome
+
+    def resolve(self, player: BatchHands, dealer: BatchHands):
+        # Same order as Game.set_hand_winners: player bust loses even if the dealer busts too
+        outcome = np.sign(player.value - dealer.value).astype(np.int8)
+        outcome = np.where(dealer.bust(), WIN, outcome)
+        outcome = np.where(player.bust(), LOSS, outcome)
+        return outcome
+
+    def run(self, rounds, bet=1):
+        for _ in range(rounds):
+            self.play_round(bet)
+        return self.summary()
+
+    def summary(self):
+        hands = int(self.wins.sum() + self.losses.sum() + self.pushes.sum())
+        return {
+            "hands": hands,
+            "wins": int(self.wins.sum()),
+            "losses": int(self.losses.sum()),
+            "pushes": int(self.pushes.sum()),
+            "blackjacks": int(self.blackjacks.sum()),
+            "net": int(self.net.sum()),
+            "ev_per_hand": float(self.net.sum()) / hands if hands else 0.0,
+            "reshuffles": int(self.shoes.reshuffles.sum()),
+        }
+
+
+
+def main():
+    game = BatchGame(tables=10000, seed=2024)
+    summary = game.run(100)
+    for key, value in summary.items():
+        print(f"{key}: {value}")
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Module: Benchmark
+Description: Throughput benchmarks for the deck, hands, rounds and long headless sessions, plus the
+             legacy functions in blackjack.py next to their refactor counterparts. Every run uses
+             fixed seeds and writes its numbers to a JSON file so versions can be compared.
+"""
+
+
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+import blackjack
+from blackjack_refactor import SPADE, Card, Deck, Hand, SUITS, VALUES
+from simulation import FlatBettor, always_play, new_headless_game
+
+
+
+BENCH_SEED = 2024
+DEFAULT_OUTPUT = "bench_output.json"
+SESSION_BANKROLL = 10 ** 12
+
+
+
+class RandomStrategy:
+    # Picks any legal move so splits and doubles show up in the session numbers
+    def __init__(self, seed=BENCH_SEED):
+        self.rng = random.Random(seed)
+
+    def choose(self, hand, choices, dealer_upcard, bet):
+        return self.rng.choice(choices)
+
+
+
+def measure(name, operations, function):
+    # function runs the benchmark and returns how many operations it did
+    start = time.perf_counter()
+    done = function(operations)
+    seconds = time.perf_counter() - start
+    return {
+        "name": name,
+        "operations": done,
+        "seconds": seconds,
+        "ops_per_sec": done / seconds if seconds else float("inf"),
+    }
+
+
+def bench_deck_shuffle(operations):
+    deck = Deck(6, verbose=False, rng=random.Random(BENCH_SEED))
+    for _ in range(operations):
+        deck.shuffle()
+    return operations
+
+
+def bench_deck_draw_card(operations):
+    deck = Deck(6, verbose=False, rng=random.Random(BENCH_SEED))
+    for _ in range(operations):
+        if not deck.size:
+            deck.discard_pile.extend(deck.cards)
+            deck.shuffle()
+        deck.draw_card()
+    return operations
+
+
+def sample_hands(count):
+    rng = random.Random(BENCH_SEED)
+    hands = []
+    for _ in range(count):
+        hand = Hand()
+        for _ in range(rng.randint(2, 4)):
+            hand.add_card(Card(rng.choice(VALUES), rng.choice(SUITS), False))
+        hands.append(hand)
+    return hands
+
+
+def bench_calculate_hand_value(operations):
+    hands = sample_hands(1000)
+    for index in range(operations):
+        hands[index % 1000].calculate_hand_value()
+    return operations
+
+
+def bench_add_card(operations):
+    rng = random.Random(BENCH_SEED)
+    cards = [Card(rng.choice(VALUES), SPADE, False) for _ in range(1000)]
+    hands = operations // 3
+    for index in range(hands):
+        hand = Hand()
+        hand.add_card(cards[index % 1000])
+        hand.add_card(cards[(index + 1) % 1000])
+        hand.add_card(cards[(index + 2) % 1000])
+    return hands * 3
+
+
+def bench_set_hand_winners(operations):
+    game = new_headless_game(rng=random.Random(BENCH_SEED))
+    player_hands = sample_hands(1000)
+    dealer_hands = sample_hands(1000)
+    for index in range(operations):
+        game.player.hands = [player_hands[index % 1000]]
+        game.dealer.hands = [dealer_hands[(index * 7) % 1000]]
+        game.hand_winners = []
+        game.set_hand_winners(0)
+    return operations
+
+
+def bench_headless_round(operations):
+    game = new_headless_game(
+        RandomStrategy(), FlatBettor(1), always_play, SESSION_BANKROLL, SESSION_BANKROLL,
+        rng=random.Random(BENCH_SEED),
+    )
+    for _ in range(operations):
+        game.play_round()
+    return operations
+
+
+def bench_session(operations):
+    # Long six-deck session with a cut card, so reshuffles and splits are part of the rate
+    game = new_headless_game(
+        RandomStrategy(), FlatBettor(5), always_play, SESSION_BANKROLL, SESSION_BANKROLL,
+        decks=6, penetration=0.75, rng=random.Random(BENCH_SEED),
+    )
+    rounds = 0
+    for _ in game.run(operations):
+        rounds += 1
+    return rounds
+
+
+def bench_legacy_deal_card(operations):
+    random.seed(BENCH_SEED)
+    for _ in range(operations):
+        blackjack.deal_card(blackjack.SUITS, blackjack.VALUES)
+    return operations
+
+
+def bench_legacy_determine_hand_value(operations):
+    random.seed(BENCH_SEED)
+    hands = [[blackjack.deal_card(blackjack.SUITS, blackjack.VALUES) for _ in range(3)] for _ in range(1000)]
+    for index in range(operations):
+        blackjack.determine_hand_value(hands[index % 1000])
+    return operations
+
+
+BENCHMARKS = [
+    ("deck_shuffle", 2000, bench_deck_shuffle),
+    ("deck_draw_card", 500000, bench_deck_draw_card),
+    ("hand_calculate_hand_value", 500000, bench_calculate_hand_value),
+    ("hand_add_card", 500001, bench_add_card),
+    ("game_set_hand_winners", 200000, bench_set_hand_winners),
+    ("headless_round", 50000, bench_headless_round),
+    ("session_rounds", 200000, bench_session),
+    ("legacy_deal_card", 500000, bench_legacy_deal_card),
+    ("legacy_determine_hand_value", 500000, bench_legacy_determine_hand_value),
+]
+
+
+
+def run_benchmarks(scale=1.0, selected=None):
+    results = []
+    for name, operations, function in BENCHMARKS:
+        if selected and name not in selected:
+            continue
+        results.append(measure(name, max(1, int(operations * scale)), function))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Blackjack engine throughput benchmarks")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="JSON results file")
+    parser.add_argument("-s", "--scale", type=float, default=1.0, help="multiply every operation count")
+    parser.add_argument("names", nargs="*", help="only run these benchmarks")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.scale, args.names)
+    for result in results:
+        print(f"{result['name']:<30} {result['ops_per_sec']:>14,.0f} ops/sec  ({result['operations']} in {result['seconds']:.3f}s)")
+
+    report = {
+        "seed": BENCH_SEED,
+        "scale": args.scale,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {args.output}")
+
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,10 @@ Date: 2024-10-04
 
 
 
+import json
+import os
 import random
+import sys
 
 
 
@@ -28,16 +31,68 @@ HIT = "h"
 STAND = "s"
 DOUBLE_DOWN = "d"
 SPLIT = "sp"
+# Only offered by rules.Rules tables that allow surrender
+SURRENDER = "su"
+MIN_DECKS = 1
+MAX_DECKS = 8
+# Every session's log is saved here under its seed, so any hand can be replayed with replay.py
+SESSION_LOG_DIR = "sessions"
+# Card drawings keyed by (value, suit), None is the facedown back
+APPEARANCES = {}
+# The same drawings split into rows, filled in by the first TableRenderer
+GLYPHS = {}
+# One byte per card for logs and checkpoints: 1 + suit index * 13 + value index, 0 is unused
+CARD_CODES = {(value, suit): 1 + suit_index * len(VALUES) + value_index
+              for suit_index, suit in enumerate(SUITS) for value_index, value in enumerate(VALUES)}
+CARDS_BY_CODE = {code: card for card, code in CARD_CODES.items()}
+INSTRUCTIONS = """
+             Blackjack!
+Your goal is to gain chips by beating
+the dealer in hands of blackjack. You
+win by hitting 21 or getting closer to
+21 than the dealer. Ties go to the
+dealer. 
+
+- Jacks, Queens, and Kings are worth 10.
+- Aces are worth either 1 or 11.
+- Every other card is worth the printed 
+  value.
+
+Hit: Add a card to your hand
+Stand: Keep your hand
+Double Down: Double your bet and only 
+             gain one more card
+Split: Create two separate hands with
+       each of your cards, making a
+       new bet for each hand.
+
+              Good luck!
+"""
+CHOICE_PROMPTS = {
+    (HIT, STAND, DOUBLE_DOWN, SPLIT): "(H)it, (S)tand, (Sp)lit, or (D)ouble Down? ",
+    (HIT, STAND, DOUBLE_DOWN): "(H)it, (S)tand, or (D)ouble Down? ",
+    (HIT, STAND, SPLIT): "(H)it, (S)tand, or (Sp)lit? ",
+    (HIT, STAND): "(H)it or (S)tand? ",
+}
 
 
 
 class Card:
-    def __init__(self, value, suit, facedown=True, next_card=None):
+    # Slots keep every card small when millions pass through a simulation
+    __slots__ = ("value", "suit", "facedown")
+
+    def __init__(self, value, suit, facedown=True):
         self.value = value
         self.suit = suit
         self.facedown = facedown
-        self.next_card = next_card
-        self.appearance = self.generate_appearance()
+
+    @property
+    def appearance(self):
+        # Drawings are shared between cards and only built the first time one is shown
+        key = None if self.facedown else (self.value, self.suit)
+        if key not in APPEARANCES:
+            APPEARANCES[key] = self.generate_appearance()
+        return APPEARANCES[key]
 
     def generate_appearance(self):
         if self.facedown:
@@ -65,21 +120,49 @@ class Card:
     
     def flip_card(self):
         self.facedown = False
-        self.appearance = self.generate_appearance()
 
-    def set_next_card(self, next_card):
-        self.next_card = next_card
-        
+    def turn_facedown(self):
+        self.facedown = True
+
 
 
 class Hand:
     def __init__(self):
         self.cards = []
         self.value = 0
+        # Running totals so adding a card never re-walks the hand
+        self.hard_value = 0
+        self.aces = 0
+        self.soft_aces = 0
+        self.pair = False
     
     def add_card(self, card: Card):
         self.cards.append(card)
-        self.set_hand_value()
+        card_value = VAL_DICT[card.value]
+        self.hard_value += card_value
+        self.value += card_value
+        if card.value == ACE:
+            self.aces += 1
+            self.soft_aces += 1
+        # Only the newest card can push the hand over 21
+        while self.value > TWENTYONE and self.soft_aces:
+            self.value -= ACE_DIFF
+            self.soft_aces -= 1
+        self.pair = len(self.cards) == 2 and self.cards[0].value == card.value
+
+    def remove_card(self) -> Card:
+        # Takes the last card back out, used when splitting a pair
+        card = self.cards.pop()
+        self.hard_value -= VAL_DICT[card.value]
+        if card.value == ACE:
+            self.aces -= 1
+        self.soft_aces = self.aces
+        self.value = self.hard_value
+        while self.value > TWENTYONE and self.soft_aces:
+            self.value -= ACE_DIFF
+            self.soft_aces -= 1
+        self.pair = len(self.cards) == 2 and self.cards[0].value == self.cards[1].value
+        return card
 
     def set_hand_value(self):
         self.value = self.calculate_hand_value()
@@ -109,51 +192,81 @@ class Hand:
         return self.value == TWENTYONE
     
     def is_pair(self):
-        return len(self.cards) == 2 and self.cards[0].value == self.cards[1].value
+        return self.pair
+
+    def is_soft(self):
+        return self.soft_aces > 0
 
     def has_aces(self):
-        return any(card.value == ACE for card in self.cards)
+        return self.aces > 0
 
     def can_double_down(self):
-        return 9 <= self.value <= 11 and self.has_aces() == 0
+        return 9 <= self.value <= 11 and not self.aces
 
 
 
 class Deck:
-    def __init__(self):
+    def __init__(self, decks=1, penetration=1.0, verbose=True, rng=None):
+        if not MIN_DECKS <= decks <= MAX_DECKS:
+            raise ValueError(f"A shoe holds between {MIN_DECKS} and {MAX_DECKS} decks, not {decks}")
+        if not 0 < penetration <= 1:
+            raise ValueError(f"Penetration must be above 0 and at most 1, not {penetration}")
+        self.decks = decks
+        self.verbose = verbose
+        self.rng = rng or random
+        # Card counters are told about every card the table can see
+        self.counters = []
         self.discard_pile = self.create_discard_pile()
-        self.top_card = None
-        self.size = 0
+        # Shoe is one contiguous list, cards are dealt by moving the cursor
+        self.cards = []
+        self.position = 0
+        # Cut card: once this many cards are dealt the shoe is reshuffled before the next round
+        self.cut_card = max(1, int(len(self.discard_pile) * penetration))
         self.shuffle()
-        
+
+    @property
+    def size(self):
+        return len(self.cards) - self.position
+
     def create_discard_pile(self):
         # Initiates all cards into list
         discard_pile = []
-        for suit in SUITS:
-            for value in VALUES:
-                discard_pile.append(Card(value, suit))
+        for _ in range(self.decks):
+            for suit in SUITS:
+                for value in VALUES:
+                    discard_pile.append(Card(value, suit))
         return discard_pile
-    
+
     def shuffle(self):
-        self.top_card = None
-        random.shuffle(self.discard_pile)
-        while self.discard_pile:
-            card = self.discard_pile.pop(0)
-            card.set_next_card(self.top_card)
-            self.top_card = card
-            self.size += 1
+        # Undealt cards and the discard pile go back in the shoe, cards still in play stay out
+        del self.cards[:self.position]
+        self.cards.extend(self.discard_pile)
+        self.discard_pile.clear()
+        self.rng.shuffle(self.cards)
+        self.position = 0
+        for counter in self.counters:
+            counter.reset()
+
+    def add_counter(self, counter):
+        self.counters.append(counter)
+
+    def card_exposed(self, card: Card):
+        for counter in self.counters:
+            counter.count_card(card)
+
+    def needs_shuffle(self):
+        return self.position >= self.cut_card
 
     def draw_card(self) -> Card:
-        if self.size > 0:
-            card_being_dealt = self.top_card
-            self.top_card = card_being_dealt.next_card
-            card_being_dealt.set_next_card(None)
-            self.size -= 1
-            return card_being_dealt
-        elif self.size == 0:
-            print("\nOut of cards, shuffling deck.\n")
+        if self.position >= len(self.cards):
+            if self.verbose:
+                print("\nOut of cards, shuffling deck.\n")
             self.shuffle()
-            return self.draw_card()
+            if not self.cards:
+                raise ValueError("No cards left in the shoe or the discard pile")
+        card_being_dealt = self.cards[self.position]
+        self.position += 1
+        return card_being_dealt
 
 
 
@@ -172,11 +285,17 @@ class Player:
     def deal_card(self, deck: Deck, hand_index=0):
         card = deck.draw_card()
         card.flip_card()
+        deck.card_exposed(card)
         self.hands[hand_index].add_card(card)
 
     def discard_cards(self, deck: Deck, hand_index=0):
         # print("Discarding cards.")
         for card in self.hands[hand_index].cards:
+            # A hole card that was never flipped is seen for the first time here
+            if card.facedown:
+                deck.card_exposed(card)
+            # Cards go back face down so a reused card can be the dealer's hole card
+            card.turn_facedown()
             deck.discard_pile.append(card)
 
     def start_new_hand(self, deck: Deck):
@@ -199,37 +318,28 @@ class Player:
     def can_increase_bet(self, bet):
         return (bet * 2) <= self.money
 
+    def get_choices(self, hand: Hand, bet):
+        # Legal moves for this hand, shared by the prompt and headless strategies
+        can_increase = self.can_increase_bet(bet)
+        if can_increase and hand.is_pair() and hand.can_double_down():
+            return [HIT, STAND, DOUBLE_DOWN, SPLIT]
+        elif can_increase and hand.can_double_down():
+            return [HIT, STAND, DOUBLE_DOWN]
+        elif can_increase and hand.is_pair():
+            return [HIT, STAND, SPLIT]
+        else:
+            return [HIT, STAND]
+
     def take_turn(self, hand: Hand, bet):
+        choices = self.get_choices(hand, bet)
+        prompt = CHOICE_PROMPTS[tuple(choices)]
         while True:
             try:
-                if self.can_increase_bet(bet) and hand.is_pair()  and hand.can_double_down():
-                    choice = input("(H)it, (S)tand, (Sp)lit, or (D)ouble Down? ").lower()
-                    choices = [HIT, STAND, DOUBLE_DOWN, SPLIT]
-                    if choice in choices:
-                        return choice
-                    else:
-                        raise ValueError()
-                elif self.can_increase_bet(bet) and hand.can_double_down():
-                    choice = input("(H)it, (S)tand, or (D)ouble Down? ").lower()
-                    choices = [HIT, STAND, DOUBLE_DOWN]
-                    if choice in choices:
-                        return choice
-                    else:
-                        raise ValueError()
-                elif self.can_increase_bet(bet)and hand.is_pair():
-                    choice = input("(H)it, (S)tand, or (Sp)lit? ").lower()
-                    choices = [HIT, STAND, SPLIT]
-                    if choice in choices:
-                        return choice
-                    else:
-                        raise ValueError()
+                choice = input(prompt).lower()
+                if choice in choices:
+                    return choice
                 else:
-                    choice = input("(H)it or (S)tand? ").lower()
-                    choices = [HIT, STAND]
-                    if choice in choices:
-                        return choice
-                    else:
-                        raise ValueError()
+                    raise ValueError()
             except ValueError:
                 print(f"Please input one of the letters in parentheses.")
 
@@ -237,7 +347,7 @@ class Player:
         # Make new hand
         new_hand = Hand()
         # Move 1 from pair to new hand
-        new_card = self.hands[hand_index].cards.pop()
+        new_card = self.hands[hand_index].remove_card()
         new_hand.add_card(new_card)
         # Assign hand to player
         self.hands.append(new_hand)
@@ -260,24 +370,182 @@ class Dealer(Player):
         self.deal_facedown_card(deck)
         self.deal_card(deck)
 
-    def take_turn(self, deck: Deck):
-        pause()
-        self.deal_card(deck)
+    def reveal_hole_card(self, deck: Deck):
+        card = self.hands[0].cards[0]
+        if card.facedown:
+            card.flip_card()
+            deck.card_exposed(card)
+
+    def play_out(self, deck: Deck, show=None, pause=None):
+        # Every table plays the dealer's hand through here: turn the hole card, then draw to
+        # DEALER_LIMIT. show is called each time a card is seen, pause before each draw
+        self.reveal_hole_card(deck)
+        if show:
+            show()
+        while self.hands[0].value < DEALER_LIMIT:
+            if pause:
+                pause()
+            self.deal_card(deck)
+            if show:
+                show()
+
+
+
+class TableRenderer:
+    def __init__(self, out=None, silent=False):
+        # Silent renderers drop everything, for games nobody is watching
+        self.out = out or sys.stdout
+        self.silent = silent
+        self.glyphs = load_glyphs() if not silent else {}
+
+    def card_rows(self, card: Card):
+        return self.glyphs[None if card.facedown else (card.value, card.suit)]
+
+    def format_cards(self, hand_of_cards):
+        # Same layout as printing each card row by row, built as one string
+        card_rows = [self.card_rows(card) for card in hand_of_cards if isinstance(card, Card)]
+        lines = []
+        for i in range(len(card_rows[0])):
+            lines.append("".join(rows[i] + " " for rows in card_rows))
+        return "\n".join(lines) + "\n"
+
+    def format_table(self, game):
+        dealer_hand = game.get_dealer_hand()
+        # Dealer first
+        if dealer_hand.cards[0].facedown:
+            frame = [f"\nDealer's hand: {VAL_DICT[dealer_hand.cards[1].value]}"]
+        else:
+            frame = [f"\nDealer's hand: {dealer_hand.value}"]
+        frame.append(self.format_cards(dealer_hand.cards))
+        # Player next
+        if len(game.player.hands) == 1:
+            frame.append(f"Your hand: {game.player.hands[0].value}")
+            frame.append(self.format_cards(game.player.hands[0].cards))
+        else:
+            for index, hand in enumerate(game.player.hands, start=1):
+                frame.append(f"Hand #{index}: {hand.value}")
+                frame.append(self.format_cards(hand.cards))
+        return "".join(frame)
+
+    def show_table(self, game):
+        if self.silent:
+            return
+        self.write(self.format_table(game))
+
+    def message(self, text="", end="\n"):
+        if self.silent:
+            return
+        self.write(f"{text}{end}")
+
+    def write(self, text):
+        # One write per frame instead of one print per card per line
+        self.out.write(text)
+        self.out.flush()
+
+
+
+def load_glyphs():
+    # Every face plus the back, split into rows once and shared by all renderers
+    if not GLYPHS:
+        back = Card(VALUES[0], SUITS[0])
+        GLYPHS[None] = back.appearance.split("\n")
+        for suit in SUITS:
+            for value in VALUES:
+                GLYPHS[(value, suit)] = Card(value, suit, False).appearance.split("\n")
+    return GLYPHS
+
+
+def hand_winner(player_value, dealer_value):
+    # A busted player loses even when the dealer busts too, equal totals push
+    if player_value > TWENTYONE:
+        return "dealer"
+    elif dealer_value > TWENTYONE:
+        return "player"
+    elif player_value > dealer_value:
+        return "player"
+    elif dealer_value > player_value:
+        return "dealer"
+    return None
+
+
+
+class SessionLog:
+    def __init__(self, seed, decks=1, penetration=1.0, player_money=P_STARTING_CHIPS, dealer_money=D_STARTING_CHIPS,
+                 table="headless"):
+        # The shoe is shuffled by random.Random(seed), so the seed and the player's answers are the whole session.
+        # table is "live" for sessions played through Game, "headless" for simulation.HeadlessGame
+        self.seed = seed
+        self.decks = decks
+        self.penetration = penetration
+        self.player_money = player_money
+        self.dealer_money = dealer_money
+        self.table = table
+        # One (opening bet, decisions) pair per round
+        self.rounds = []
+
+    def add_round(self, bet, decisions):
+        self.rounds.append((bet, list(decisions)))
+
+    def record(self, result):
+        # Takes a simulation.RoundResult
+        self.add_round(result.bet, result.decisions)
+
+    def to_dict(self):
+        return {
+            "seed": self.seed,
+            "decks": self.decks,
+            "penetration": self.penetration,
+            "player_money": self.player_money,
+            "dealer_money": self.dealer_money,
+            "table": self.table,
+            "rounds": [[bet, decisions] for bet, decisions in self.rounds],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        log = cls(data["seed"], data["decks"], data["penetration"], data["player_money"], data["dealer_money"],
+                  data.get("table", "headless"))
+        log.rounds = [(bet, list(decisions)) for bet, decisions in data["rounds"]]
+        return log
+
+    def save(self, path):
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as file:
+            return cls.from_dict(json.load(file))
+
+
+def new_session(decks=1, penetration=1.0, player_money=P_STARTING_CHIPS, dealer_money=D_STARTING_CHIPS, verbose=True):
+    # A fresh seed from the OS, the shoe it shuffles and the log the session is recorded into
+    seed = random.SystemRandom().getrandbits(64)
+    deck = Deck(decks, penetration, verbose, random.Random(seed))
+    return deck, SessionLog(seed, decks, penetration, player_money, dealer_money, "live")
 
 
 
 class Game:
-    def __init__(self, dealer: Dealer, player: Player, deck: Deck, intro: str):
+    def __init__(self, dealer: Dealer, player: Player, deck: Deck, intro: str, renderer=None, log=None):
         self.dealer = dealer
         self.player = player
         self.deck = deck
+        self.renderer = renderer or TableRenderer()
+        # Bets and decisions are added to log (a SessionLog) as each round is settled
+        self.log = log
+        # Waits for the player before each dealer draw, None lets the dealer play straight through
+        self.dealer_pause = pause
         self.play_again = True
         self.hand_winners = []
         self.bet = 0
-        print(intro)
+        self.opening_bet = 0
+        self.decisions = []
+        if intro:
+            self.renderer.message(intro)
 
     def print_money(self):
-        print(f"Dealer money: ${self.dealer.money}\nPlayer money: ${self.player.money}\n")
+        self.renderer.message(f"Dealer money: ${self.dealer.money}\nPlayer money: ${self.player.money}\n")
 
     def get_bet(self):
         while True:     
@@ -288,39 +556,17 @@ class Game:
                 else:
                     raise ValueError()
             except ValueError:
-                print(f"Please input a bet between 0 and {self.player.money}")
+                self.renderer.message(f"Please input a bet between 0 and {self.player.money}")
     
     def get_dealer_hand(self):
         # Dealer only ever has one hand
         return self.dealer.hands[0]
 
     def print_cards(self, hand_of_cards):
-        card_lines = []
-        num_of_cards = len(hand_of_cards)
-        for card in hand_of_cards:
-            if isinstance(card, Card):
-                card_lines.append(card.appearance.split("\n"))
-        for i in range(len(card_lines[0])):
-            for j in range(num_of_cards):
-                print(card_lines[j][i], end=" ")
-            print()
+        self.renderer.message(self.renderer.format_cards(hand_of_cards), end="")
     
     def print_all_hands(self):
-        # Dealer first
-        if self.get_dealer_hand().cards[0].facedown == True:
-            print(f"\nDealer's hand: {VAL_DICT[self.get_dealer_hand().cards[1].value]}", end="")
-            self.print_cards(self.dealer.hands[0].cards)
-        else:
-            print(f"\nDealer's hand: {self.get_dealer_hand().value}", end="")
-            self.print_cards(self.dealer.hands[0].cards)
-        # Player next
-        if len(self.player.hands) == 1:
-            print(f"Your hand: {self.player.hands[0].value}", end="")
-            self.print_cards(self.player.hands[0].cards)
-        else:
-            for index, hand in enumerate(self.player.hands, start=1):
-                print(f"Hand #{index}: {hand.value}", end="")
-                self.print_cards(hand.cards)
+        self.renderer.show_table(self)
 
     def set_play_again(self):
         play_list = ["n", "y"]
@@ -337,7 +583,7 @@ class Game:
                 else:
                     raise ValueError()
             except ValueError:
-                print("Please type either y or n.")
+                self.renderer.message("Please type either y or n.")
     
     def update_money(self, current_hand_idx):
         hand_winner = self.hand_winners[current_hand_idx]
@@ -350,30 +596,30 @@ class Game:
     
     def set_hand_winners(self, current_hand_idx):
         player_hand = self.player.hands[current_hand_idx]
-        dealer_hand = self.get_dealer_hand()
-
-        if player_hand.bust() and dealer_hand.bust():
-            self.hand_winners.append("dealer")
-        elif player_hand.bust():
-            self.hand_winners.append("dealer")
-        elif dealer_hand.bust():
-            self.hand_winners.append("player")
-        else:
-            if player_hand.value > self.get_dealer_hand().value:
-                self.hand_winners.append("player")
-            elif self.get_dealer_hand().value > player_hand.value:
-                self.hand_winners.append("dealer")
-            else:
-                self.hand_winners.append(None)
+        self.hand_winners.append(hand_winner(player_hand.value, self.get_dealer_hand().value))
             
     def start_round(self):
+        # Shuffle before the bet, so the player can see a new shoe is starting
+        if self.deck.needs_shuffle():
+            self.deck.shuffle()
         self.bet = self.get_bet()
+        self.opening_bet = self.bet
+        self.decisions = []
         self.hand_winners = []
         self.dealer.start_new_hand(self.deck)
         self.player.start_new_hand(self.deck)
         self.print_all_hands()
         
     def end_round(self):
+        self.settle_hands()
+
+        if self.is_bankrupt():
+            self.play_again = False
+            return
+
+        self.set_play_again()
+
+    def settle_hands(self):
         current_hand = 0
         while current_hand < len(self.player.hands):
             self.set_hand_winners(current_hand)
@@ -382,12 +628,10 @@ class Game:
             self.print_money()
             self.player.discard_cards(self.deck, current_hand)
             current_hand += 1
-
-        if self.is_bankrupt():
-            self.play_again = False
-            return
-
-        self.set_play_again()
+        # Dealer's cards go back in the deck too, otherwise the deck runs dry
+        self.dealer.discard_cards(self.deck)
+        if self.log is not None:
+            self.log.add_round(self.opening_bet, self.decisions)
 
     def print_winner_message(self, current_hand_idx):
         hand_winner = self.hand_winners[current_hand_idx]
@@ -395,29 +639,42 @@ class Game:
 
         if len(self.player.hands) == 1:
             if hand_winner == "player":
-                print("You win!")
+                self.renderer.message("You win!")
             elif hand_winner == "dealer":
-                print("Sorry, the dealer wins.")
+                self.renderer.message("Sorry, the dealer wins.")
             elif hand_winner is None and not player_hand.bust() and not self.get_dealer_hand().bust():
-                print("You tied!")
+                self.renderer.message("You tied!")
         else:
             if hand_winner == "player":
-                print(f"\nHand #{current_hand_idx + 1} wins!")
+                self.renderer.message(f"\nHand #{current_hand_idx + 1} wins!")
             elif hand_winner == "dealer":
-                print(f"\nHand #{current_hand_idx + 1} loses.")
+                self.renderer.message(f"\nHand #{current_hand_idx + 1} loses.")
             elif hand_winner is None and not player_hand.bust() and not self.get_dealer_hand().bust():
-                print(f"\nHand #{current_hand_idx + 1} tied!")
+                self.renderer.message(f"\nHand #{current_hand_idx + 1} tied!")
     
     def player_turn(self):
+        steps = self.player_turn_steps()
+        try:
+            hand = next(steps)
+            while True:
+                hand = steps.send(self.player.take_turn(hand, self.bet))
+        except StopIteration as finished:
+            return finished.value
+
+    def player_turn_steps(self):
+        # The player's turn as a generator: it yields each hand that needs a decision and is sent
+        # the choice, so the terminal game and the server play it the same way however they ask.
+        # Returns True if the only hand busted
         current_hand = 0
         while current_hand < len(self.player.hands):
             hand = self.player.hands[current_hand]
 
             if len(self.player.hands) > 1:
-                    print(f"\nPlaying Hand #{current_hand + 1}") 
+                    self.renderer.message(f"\nPlaying Hand #{current_hand + 1}") 
             
             while not hand.bust():                    
-                player_choice = self.player.take_turn(hand, self.bet)
+                player_choice = yield hand
+                self.decisions.append(player_choice)
                 if player_choice == STAND:
                     current_hand += 1
                     break
@@ -437,21 +694,16 @@ class Game:
 
             if hand.bust():
                 if len(self.player.hands) == 1:
-                    print("You BUSTED!")
+                    self.renderer.message("You BUSTED!")
                     return True
                 else:
-                    print(f"Hand #{current_hand + 1} BUSTED!")
+                    self.renderer.message(f"Hand #{current_hand + 1} BUSTED!")
                     current_hand += 1
 
         return False
     
     def dealer_turn(self):
-        card1 = self.get_dealer_hand().cards[0]
-        card1.flip_card()
-        self.print_all_hands()
-        while self.get_dealer_hand().value < DEALER_LIMIT:
-            self.dealer.take_turn(self.deck)
-            self.print_all_hands()
+        self.dealer.play_out(self.deck, self.print_all_hands, self.dealer_pause)
 
     def update_bankrupt(self):
         self.dealer.set_bankrupt()
@@ -463,48 +715,36 @@ class Game:
         
     def end_game(self):
         if self.dealer.bankrupt:
-            print("The dealer ran out of money!")
+            self.renderer.message("The dealer ran out of money!")
         elif self.player.bankrupt:
-            print("You ran out of chips!")
-        print("Thanks for playing!")
+            self.renderer.message("You ran out of chips!")
+        self.renderer.message("Thanks for playing!")
         if self.player.money > P_STARTING_CHIPS:
-            print(f"You made ${self.player.money - P_STARTING_CHIPS}!")
+            self.renderer.message(f"You made ${self.player.money - P_STARTING_CHIPS}!")
         elif self.player.money < P_STARTING_CHIPS:
-            print(f"Sorry, you lost ${P_STARTING_CHIPS - self.player.money}.")
+            self.renderer.message(f"Sorry, you lost ${P_STARTING_CHIPS - self.player.money}.")
 
 
 
 def main():
     # Start game
-    instructions = """
-             Blackjack!
-Your goal is to gain chips by beating
-the dealer in hands of blackjack. You
-win by hitting 21 or getting closer to
-21 than the dealer. Ties go to the
-dealer. 
-
-- Jacks, Queens, and Kings are worth 10.
-- Aces are worth either 1 or 11.
-- Every other card is worth the printed 
-  value.
-
-Hit: Add a card to your hand
-Stand: Keep your hand
-Double Down: Double your bet and only 
-             gain one more card
-Split: Create two separate hands with
-       each of your cards, making a
-       new bet for each hand.
-
-              Good luck!
-"""
     player = Player(P_STARTING_CHIPS)
     dealer = Dealer(D_STARTING_CHIPS)
-    deck = Deck()
-    blackjack = Game(dealer, player, deck, instructions)
+    deck, log = new_session()
+    blackjack = Game(dealer, player, deck, INSTRUCTIONS, log=log)
     blackjack.print_money()
+    try:
+        play_session(blackjack)
+    finally:
+        # Saved even if the player quits mid-round, replay.py can reproduce every settled round
+        os.makedirs(SESSION_LOG_DIR, exist_ok=True)
+        path = os.path.join(SESSION_LOG_DIR, f"session-{log.seed}.json")
+        log.save(path)
+        blackjack.renderer.message(f"This session was saved to {path}")
+
+
 
+def play_session(blackjack: Game):
     while blackjack.play_again:
 
         # Deal initial hands
@@ -512,7 +752,7 @@ Split: Create two separate hands with
 
         # Check for blackjack (blackjack only works on first hand)
         if blackjack.player.hands[0].blackjack():
-            print("BLACKJACK!")
+            blackjack.renderer.message("BLACKJACK!")
             blackjack.end_round()
             if not blackjack.play_again:
                 break
@@ -536,7 +776,7 @@ Split: Create two separate hands with
 
         # Check for dealer bust
         if blackjack.get_dealer_hand().bust():
-            print("The dealer BUSTED!")
+            blackjack.renderer.message("The dealer BUSTED!")
             
         # End of round cleanup
         blackjack.end_round()
@@ -0,0 +1,161 @@
+"""
+Module: Cache
+Description: SQLite cache for simulation reports and solved strategy tables. A simulation is keyed
+             by a hash of its rules, strategy, bettor, seed and bankrolls plus its round count.
+             The run's checkpoint is stored with it, so asking for more rounds of a cached run
+             resumes it instead of starting over, with the same result a fresh run would give.
+"""
+
+
+
+import hashlib
+import json
+import random
+import sqlite3
+import sys
+import time
+
+from checkpoint import CheckpointedSimulation
+from parallel import SIMULATION_BANKROLL, new_stats
+from rules import Rules, new_rules_game
+from simulation import FlatBettor, MimicDealerStrategy, always_play
+from strategy_table import StrategyTable
+
+
+
+DEFAULT_PATH = "results.sqlite"
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS simulations (
+    config TEXT NOT NULL,
+    rounds INTEGER NOT NULL,
+    report TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (config, rounds)
+);
+CREATE TABLE IF NOT EXISTS solved_tables (
+    config TEXT PRIMARY KEY,
+    table_json TEXT NOT NULL,
+    created REAL NOT NULL
+);
+"""
+
+
+
+def canonical(value):
+    # A JSON-able description that only depends on the object's settings and state
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, (list, tuple)):
+        return [canonical(item) for item in value]
+    if isinstance(value, dict):
+        return sorted(([canonical(key), canonical(item)] for key, item in value.items()), key=json.dumps)
+    if isinstance(value, random.Random):
+        return ["random.Random", canonical(value.getstate())]
+    if callable(value) and hasattr(value, "__qualname__"):
+        return f"{value.__module__}.{value.__qualname__}"
+    if isinstance(value, Rules):
+        return ["Rules", canonical(value.to_dict())]
+    state = getattr(value, "__dict__", None)
+    if state is None:
+        raise ValueError(f"Can't build a cache key for {value!r}")
+    return [f"{type(value).__module__}.{type(value).__qualname__}", canonical(state)]
+
+
+def config_key(**settings):
+    text = json.dumps(canonical(settings), separators=(",", ":"))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+
+class ResultCache:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+        self.hits = 0
+        self.extensions = 0
+        self.misses = 0
+
+    def simulate(self, rounds, seed=0, rules=None, strategy=None, bettor=None, penetration=1.0,
+                 player_money=SIMULATION_BANKROLL, dealer_money=SIMULATION_BANKROLL):
+        # Returns the StreamingStats report for the first rounds rounds of this configuration
+        rules = rules or Rules()
+        strategy = strategy or MimicDealerStrategy()
+        bettor = bettor or FlatBettor()
+        # Keyed on the starting state, before the run changes any strategy or bettor
+        config = config_key(rules=rules, strategy=strategy, bettor=bettor, seed=seed, penetration=penetration,
+                            player_money=player_money, dealer_money=dealer_money)
+
+        row = self.connection.execute(
+            "SELECT report FROM simulations WHERE config = ? AND rounds = ?", (config, rounds)
+        ).fetchone()
+        if row:
+            self.hits += 1
+            return json.loads(row[0])
+
+        # The longest shorter run is picked up where it stopped
+        row = self.connection.execute(
+            "SELECT checkpoint FROM simulations WHERE config = ? AND rounds < ? ORDER BY rounds DESC LIMIT 1",
+            (config, rounds),
+        ).fetchone()
+        if row:
+            self.extensions += 1
+            simulation = CheckpointedSimulation.from_bytes(row[0])
+            simulation.rounds = rounds
+        else:
+            self.misses += 1
+            game = new_rules_game(rules, strategy, bettor, always_play, player_money, dealer_money,
+                                  penetration, random.Random(seed))
+            simulation = CheckpointedSimulation(game, rounds, stats=new_stats())
+
+        report = simulation.run().report()
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO simulations VALUES (?, ?, ?, ?, ?)",
+                (config, rounds, json.dumps(report), simulation.to_bytes(), time.time()),
+            )
+        return report
+
+    def solved_table(self, decks=1):
+        config = config_key(solver="strategy_table.StrategyTable.from_solver", decks=decks)
+        row = self.connection.execute("SELECT table_json FROM solved_tables WHERE config = ?", (config,)).fetchone()
+        if row:
+            self.hits += 1
+            return StrategyTable(json.loads(row[0]))
+        self.misses += 1
+        strategy = StrategyTable.from_solver(decks)
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO solved_tables VALUES (?, ?, ?)", (config, json.dumps(strategy.table), time.time())
+            )
+        return strategy
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+
+def main():
+    # python cache.py [ROUNDS] [SEED]
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    with ResultCache() as cache:
+        start = time.perf_counter()
+        report = cache.simulate(rounds, seed)
+        elapsed = time.perf_counter() - start
+        source = "cached" if cache.hits else "extended" if cache.extensions else "simulated"
+        print(f"{source} in {elapsed:.3f}s")
+        for key in ["rounds", "net", "ev_per_round", "ev_per_round_ci95"]:
+            print(f"{key}: {report[key]}")
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Module: Checkpoint
+Description: Lets a long headless simulation save its whole state between rounds and carry on later
+             with exactly the results it would have had. The shoe order and cursor, discard pile,
+             bankrolls, RNG state, strategy, bettor and statistics all go in one compressed file.
+"""
+
+
+
+import os
+import pickle
+import random
+import sys
+import zlib
+
+from blackjack_refactor import CARD_CODES, CARDS_BY_CODE, Card, Deck
+from parallel import BANKROLL_BINS, BANKROLL_SPREAD
+from rules import Rules, RulesGame, new_rules_game
+from simulation import FlatBettor, MimicDealerStrategy, always_play, new_headless_game
+from stats import StreamingStats
+
+
+
+CHECKPOINT_VERSION = 1
+DEFAULT_INTERVAL = 100000
+
+
+
+def encode_cards(cards):
+    return bytes(CARD_CODES[(card.value, card.suit)] for card in cards)
+
+
+def decode_cards(codes):
+    # Between rounds every card is face down, in the shoe or in the discard pile
+    return [Card(*CARDS_BY_CODE[code]) for code in codes]
+
+
+def capture_deck(deck: Deck):
+    if not isinstance(deck.rng, random.Random):
+        raise ValueError("Only a deck shuffled by its own random.Random can be checkpointed")
+    if deck.counters:
+        # Counters (and bettors holding them) would come back attached to a copy of the old deck
+        raise ValueError("A deck with card counters attached can't be checkpointed")
+    return {
+        "decks": deck.decks,
+        "cut_card": deck.cut_card,
+        "cards": encode_cards(deck.cards),
+        "position": deck.position,
+        "discard_pile": encode_cards(deck.discard_pile),
+        "rng_state": deck.rng.getstate(),
+    }
+
+
+def restore_deck(state):
+    rng = random.Random()
+    deck = Deck(state["decks"], verbose=False, rng=rng)
+    deck.cards = decode_cards(state["cards"])
+    deck.position = state["position"]
+    deck.discard_pile = decode_cards(state["discard_pile"])
+    deck.cut_card = state["cut_card"]
+    rng.setstate(state["rng_state"])
+    return deck
+
+
+
+class CheckpointedSimulation:
+    def __init__(self, game, rounds, path=None, interval=DEFAULT_INTERVAL, stats=None, rounds_done=0):
+        # Without a path nothing is written, the state is only taken with to_bytes
+        self.game = game
+        self.rounds = rounds
+        self.path = path
+        self.interval = interval
+        # Bankroll histogram centred on where the player starts, like parallel.new_stats
+        money = game.player.money
+        self.stats = stats or StreamingStats(money - BANKROLL_SPREAD, money + BANKROLL_SPREAD, BANKROLL_BINS)
+        self.rounds_done = rounds_done
+
+    def capture(self):
+        # Only valid between rounds, when nothing is left on the table
+        return {
+            "version": CHECKPOINT_VERSION,
+            "deck": capture_deck(self.game.deck),
+            "rules": self.game.rules.to_dict() if isinstance(self.game, RulesGame) else None,
+            "player_money": self.game.player.money,
+            "dealer_money": self.game.dealer.money,
+            "strategy": self.game.strategy,
+            "bettor": self.game.bettor,
+            "play_again_rule": self.game.play_again_rule,
+            "play_again": self.game.play_again,
+            "stats": self.stats,
+            "rounds": self.rounds,
+            "rounds_done": self.rounds_done,
+            "interval": self.interval,
+        }
+
+    def to_bytes(self):
+        return zlib.compress(pickle.dumps(self.capture(), protocol=pickle.HIGHEST_PROTOCOL))
+
+    def save(self):
+        data = self.to_bytes()
+        # Write then rename, so a machine going away mid-save leaves the last checkpoint intact
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+
+    @classmethod
+    def from_bytes(cls, data, path=None):
+        state = pickle.loads(zlib.decompress(data))
+        if state["version"] != CHECKPOINT_VERSION:
+            raise ValueError(f"Version {state['version']} checkpoint, expected {CHECKPOINT_VERSION}")
+        if state["rules"] is not None:
+            game = new_rules_game(
+                Rules.from_dict(state["rules"]), state["strategy"], state["bettor"], state["play_again_rule"],
+                state["player_money"], state["dealer_money"],
+            )
+        else:
+            game = new_headless_game(
+                state["strategy"], state["bettor"], state["play_again_rule"], state["player_money"], state["dealer_money"],
+            )
+        game.deck = restore_deck(state["deck"])
+        game.play_again = state["play_again"]
+        return cls(game, state["rounds"], path, state["interval"], state["stats"], state["rounds_done"])
+
+    @classmethod
+    def resume(cls, path):
+        with open(path, "rb") as file:
+            return cls.from_bytes(file.read(), path)
+
+    def run(self):
+        while self.rounds_done < self.rounds:
+            if not self.game.play_again or self.game.is_bankrupt():
+                break
+            self.stats.add(self.game.play_round())
+            self.rounds_done += 1
+            if self.path and self.rounds_done % self.interval == 0:
+                self.save()
+        if self.path:
+            self.save()
+        return self.stats
+
+
+
+def main():
+    # python checkpoint.py PATH [ROUNDS] starts a run, or picks one up if PATH already exists
+    path = sys.argv[1] if len(sys.argv) > 1 else "simulation.ckpt"
+    if os.path.exists(path):
+        simulation = CheckpointedSimulation.resume(path)
+        print(f"Resuming at round {simulation.rounds_done} of {simulation.rounds}")
+    else:
+        rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 1000000
+        game = new_headless_game(MimicDealerStrategy(), FlatBettor(1), always_play, 10 ** 12, 10 ** 12,
+                                 rng=random.Random(0))
+        simulation = CheckpointedSimulation(game, rounds, path)
+    report = simulation.run().report()
+    for key in ["rounds", "hands", "net", "ev_per_round", "ev_per_round_ci95"]:
+        print(f"{key}: {report[key]}")
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Module: Counting
+Description: Card counters that keep a running count as the deck shows cards to the table, and
+             work out the true count from how many cards are left without rescanning the shoe.
+"""
+
+
+
+from blackjack_refactor import SPLIT, SUITS, VALUES, Deck, Hand, Player
+from probability import RANK_INDEX, RANKS
+
+
+
+CARDS_PER_DECK = len(SUITS) * len(VALUES)
+
+
+def tag_table(ace, two, three, four, five, six, seven, eight, nine, ten):
+    tags = dict(zip(VALUES, [ace, two, three, four, five, six, seven, eight, nine, ten]))
+    # Jacks, queens and kings count the same as tens
+    for face in VALUES[10:]:
+        tags[face] = ten
+    return tags
+
+
+HI_LO = tag_table(-1, 1, 1, 1, 1, 1, 0, 0, 0, -1)
+KO = tag_table(-1, 1, 1, 1, 1, 1, 1, 0, 0, -1)
+HI_OPT_I = tag_table(0, 0, 1, 1, 1, 1, 0, 0, 0, -1)
+HI_OPT_II = tag_table(0, 1, 1, 2, 2, 1, 1, 0, 0, -2)
+OMEGA_II = tag_table(0, 1, 1, 2, 2, 2, 1, 0, -1, -2)
+ZEN = tag_table(-1, 1, 1, 2, 2, 2, 1, 0, 0, -2)
+COUNT_SYSTEMS = {
+    "hi-lo": HI_LO,
+    "ko": KO,
+    "hi-opt-i": HI_OPT_I,
+    "hi-opt-ii": HI_OPT_II,
+    "omega-ii": OMEGA_II,
+    "zen": ZEN,
+}
+
+
+
+class CardCounter:
+    def __init__(self, tags=HI_LO, initial_count=0):
+        # Unbalanced systems like KO start from a negative count, e.g. 4 - 4 * decks
+        self.tags = tags
+        self.initial_count = initial_count
+        self.running_count = initial_count
+        self.cards_seen = 0
+
+    def count_card(self, card):
+        self.running_count += self.tags[card.value]
+        self.cards_seen += 1
+
+    def reset(self):
+        self.running_count = self.initial_count
+        self.cards_seen = 0
+
+    def true_count(self, deck: Deck):
+        # Deck.size is kept by the shoe's cursor, so this never walks the cards
+        decks_remaining = deck.size / CARDS_PER_DECK
+        if decks_remaining <= 0:
+            return 0.0
+        return self.running_count / decks_remaining
+
+
+
+def attach_counter(deck: Deck, system="hi-lo"):
+    tags = COUNT_SYSTEMS[system]
+    initial_count = 4 - 4 * deck.decks if system == "ko" else 0
+    counter = CardCounter(tags, initial_count)
+    deck.add_counter(counter)
+    return counter
+
+
+
+class SpreadBettor:
+    # Bets one unit at a true count of 1 or less, and one more unit per true count above that
+    def __init__(self, counter: CardCounter, deck: Deck, unit=1, max_units=8):
+        self.counter = counter
+        self.deck = deck
+        self.unit = unit
+        self.max_units = max_units
+
+    def get_bet(self, player: Player):
+        units = min(max(int(self.counter.true_count(self.deck)), 1), self.max_units)
+        return max(min(units * self.unit, player.money), 0)
+
+
+
+class DeviationStrategy:
+    # Plays like base except where a deviation index applies. deviations maps
+    # (kind, number, upcard) keys, as in StrategyTable.from_chart, to (index, move):
+    # the move is played when the true count is at or above the index and the move is legal
+    def __init__(self, base, counter: CardCounter, deck: Deck, deviations):
+        self.base = base
+        self.counter = counter
+        self.deck = deck
+        self.deviations = deviations
+
+    def choose(self, hand: Hand, choices, dealer_upcard, bet):
+        upcard = RANKS[RANK_INDEX[dealer_upcard.value]]
+        if SPLIT in choices:
+            key = ("pair", RANKS[RANK_INDEX[hand.cards[0].value]], upcard)
+        else:
+            key = ("soft" if hand.is_soft() else "hard", hand.value, upcard)
+        deviation = self.deviations.get(key)
+        if deviation is not None:
+            index, move = deviation
+            if move in choices and self.counter.true_count(self.deck) >= index:
+                return move
+        return self.base.choose(hand, choices, dealer_upcard, bet)
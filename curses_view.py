@@ -0,0 +1,137 @@
+"""
+Module: Curses View
+Description: Keeps bot tables on screen with curses. Each hand is its own region and only regions
+             whose text changed since the last frame are redrawn, so watching several tables
+             over a slow link doesn't reprint the whole table after every card.
+"""
+
+
+
+import curses
+import sys
+import time
+
+from blackjack_refactor import VAL_DICT, TableRenderer
+from simulation import FlatBettor, MimicDealerStrategy, always_play, new_headless_game
+
+
+
+TABLE_WIDTH = 52
+STATUS = "status"
+TITLE = "title"
+
+
+
+class CursesRenderer(TableRenderer):
+    def __init__(self, window, title=""):
+        super().__init__()
+        self.window = window
+        self.title = title
+        # Region name -> (first row, lines) as last drawn
+        self.drawn = {}
+        self.height = 0
+        self.status = ""
+        self.redraws = 0
+
+    def card_lines(self, cards):
+        # Glyph rows without the blank first and last rows
+        return self.format_cards(cards).split("\n")[1:-2]
+
+    def regions(self, game):
+        dealer_hand = game.get_dealer_hand()
+        if dealer_hand.cards[0].facedown:
+            dealer_value = VAL_DICT[dealer_hand.cards[1].value]
+        else:
+            dealer_value = dealer_hand.value
+        regions = [
+            (TITLE, [f"{self.title}  Dealer ${game.dealer.money}  Player ${game.player.money}"]),
+            ("dealer", [f"Dealer's hand: {dealer_value}"] + self.card_lines(dealer_hand.cards)),
+        ]
+        for index, hand in enumerate(game.player.hands, start=1):
+            label = "Your hand" if len(game.player.hands) == 1 else f"Hand #{index}"
+            regions.append((f"hand{index}", [f"{label}: {hand.value}"] + self.card_lines(hand.cards)))
+        regions.append((STATUS, [self.status]))
+        return regions
+
+    def show_table(self, game):
+        row = 0
+        seen = set()
+        for name, lines in self.regions(game):
+            seen.add(name)
+            if self.drawn.get(name) != (row, lines):
+                self.draw_lines(row, lines, self.drawn.get(name))
+                self.drawn[name] = (row, lines)
+            row += len(lines)
+        # Anything that used to be below the last region (e.g. split hands) is wiped
+        for name in list(self.drawn):
+            if name not in seen:
+                del self.drawn[name]
+        for blank_row in range(row, self.height):
+            self.put(blank_row, "")
+        self.height = row
+        self.window.noutrefresh()
+
+    def draw_lines(self, row, lines, previous):
+        self.redraws += 1
+        previous_row, previous_lines = previous if previous else (None, [])
+        for offset, line in enumerate(lines):
+            # A region that only moved or grew still skips lines that are already on screen
+            if previous_row == row and offset < len(previous_lines) and previous_lines[offset] == line:
+                continue
+            self.put(row + offset, line)
+
+    def put(self, row, text):
+        height, width = self.window.getmaxyx()
+        if row >= height:
+            return
+        try:
+            self.window.move(row, 0)
+            self.window.clrtoeol()
+            self.window.addstr(row, 0, text[:width - 1])
+        except curses.error:
+            pass
+
+    def message(self, text="", end="\n"):
+        self.status = text.strip()
+        if STATUS in self.drawn:
+            row, lines = self.drawn[STATUS]
+            if lines != [self.status]:
+                self.put(row, self.status)
+                self.drawn[STATUS] = (row, [self.status])
+                self.window.noutrefresh()
+
+
+
+def watch(screen, tables=3, rounds=100, delay=0.2, bet=10):
+    curses.curs_set(0)
+    screen.clear()
+    screen.refresh()
+    height, width = screen.getmaxyx()
+    columns = max(1, min(tables, width // TABLE_WIDTH))
+    games = []
+    for index in range(columns):
+        window = screen.derwin(height, min(TABLE_WIDTH, width - index * TABLE_WIDTH), 0, index * TABLE_WIDTH)
+        renderer = CursesRenderer(window, f"Table {index + 1}")
+        games.append(new_headless_game(MimicDealerStrategy(), FlatBettor(bet), always_play, renderer=renderer))
+
+    for round_number in range(1, rounds + 1):
+        for game in games:
+            if game.is_bankrupt():
+                continue
+            result = game.play_round()
+            game.renderer.message(f"Round {round_number}: {' '.join(str(outcome) for outcome in result.outcomes)} net {result.net:+}")
+        # One physical screen update for every table
+        curses.doupdate()
+        time.sleep(delay)
+
+
+
+def main():
+    tables = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    curses.wrapper(watch, tables, rounds)
+
+
+
+if __name__ == "__main__":
+    main()
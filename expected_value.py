@@ -0,0 +1,177 @@
+"""
+Module: Expected Value
+Description: Exact expected return of hit, stand and double down for a player hand, dealer upcard
+             and remaining shoe. Split is an approximation, not exact: the two hands are played
+             independently from the same shoe and are never split again. Uses the refactor's
+             rules: ties push, doubles are allowed on any hard 9-11, the dealer stands at
+             DEALER_LIMIT and a natural is settled against the dealer's first two cards. States
+             are cached by total and shoe composition, so the order the cards came out in doesn't matter.
+"""
+
+
+
+from functools import lru_cache
+
+from blackjack_refactor import ACE, ACE_DIFF, DEALER_LIMIT, DOUBLE_DOWN, HIT, SPLIT, STAND, TWENTYONE
+from probability import (
+    BLACKJACK,
+    BUST,
+    RANK_INDEX,
+    RANKS,
+    add_to_total,
+    composition_from_cards,
+    dealer_probabilities,
+    full_composition,
+    remove_cards,
+)
+
+
+
+EV_CACHE_SIZE = 2 ** 20
+DOUBLE_LOW = 9
+DOUBLE_HIGH = 11
+
+
+
+def can_double(value, aces):
+    # Same window as Hand.can_double_down
+    return DOUBLE_LOW <= value <= DOUBLE_HIGH and not aces
+
+
+@lru_cache(maxsize=EV_CACHE_SIZE)
+def stand_ev(value, upcard, composition):
+    if value > TWENTYONE:
+        return -1.0
+    dealer = dealer_probabilities(upcard, composition)
+    ev = dealer[BUST]
+    for total in range(DEALER_LIMIT, TWENTYONE + 1):
+        chance = dealer[total] + (dealer[BLACKJACK] if total == TWENTYONE else 0.0)
+        if value > total:
+            ev += chance
+        elif value < total:
+            ev -= chance
+    return ev
+
+
+def natural_ev(upcard, composition):
+    # The round ends on the deal, so a natural only pushes when the hole card gives the dealer 21 too
+    if upcard == ACE:
+        completing = RANK_INDEX[str(ACE_DIFF)]
+    elif upcard == str(ACE_DIFF):
+        completing = RANK_INDEX[ACE]
+    else:
+        return 1.0
+    return 1.0 - composition[completing] / sum(composition)
+
+
+def draws(value, soft_aces, composition):
+    # Every card that could come next, with its chance and the state it leads to
+    remaining = sum(composition)
+    for rank, count in enumerate(composition):
+        if count:
+            next_value, next_soft = add_to_total(value, soft_aces, rank)
+            next_composition = composition[:rank] + (count - 1,) + composition[rank + 1:]
+            yield count / remaining, rank, next_value, next_soft, next_composition
+
+
+@lru_cache(maxsize=EV_CACHE_SIZE)
+def hit_ev(value, soft_aces, aces, upcard, composition):
+    ev = 0.0
+    for chance, rank, next_value, next_soft, next_composition in draws(value, soft_aces, composition):
+        next_aces = aces + (RANKS[rank] == ACE)
+        ev += chance * best_ev(next_value, next_soft, next_aces, upcard, next_composition)
+    return ev
+
+
+@lru_cache(maxsize=EV_CACHE_SIZE)
+def double_ev(value, soft_aces, upcard, composition):
+    ev = 0.0
+    for chance, rank, next_value, next_soft, next_composition in draws(value, soft_aces, composition):
+        ev += chance * stand_ev(next_value, upcard, next_composition)
+    return 2 * ev
+
+
+@lru_cache(maxsize=EV_CACHE_SIZE)
+def best_ev(value, soft_aces, aces, upcard, composition):
+    # Best of the moves open to a hand that can no longer split
+    if value > TWENTYONE:
+        return -1.0
+    if not sum(composition):
+        return stand_ev(value, upcard, composition)
+    ev = max(stand_ev(value, upcard, composition), hit_ev(value, soft_aces, aces, upcard, composition))
+    if can_double(value, aces):
+        ev = max(ev, double_ev(value, soft_aces, upcard, composition))
+    return ev
+
+
+def split_ev(pair_value, upcard, composition):
+    # Each split hand keeps one card of the pair and draws its own second card. The two hands
+    # are treated as independent and are not split again, so unlike the other moves this is
+    # a close approximation rather than exact
+    rank = RANK_INDEX[pair_value]
+    start_value, start_soft = add_to_total(0, 0, rank)
+    start_aces = int(RANKS[rank] == ACE)
+    ev = 0.0
+    for chance, drawn, next_value, next_soft, next_composition in draws(start_value, start_soft, composition):
+        next_aces = start_aces + (RANKS[drawn] == ACE)
+        ev += chance * best_ev(next_value, next_soft, next_aces, upcard, next_composition)
+    return 2 * ev
+
+
+def action_evs(player_values, upcard, composition, can_increase_bet=True, natural=True):
+    # player_values are card values like ["8", "8"], composition is every unseen card
+    # (the shoe plus the dealer's hole card), and the result maps each legal move to its EV.
+    # A two-card 21 is a natural with nothing to decide, unless natural is False (a split hand,
+    # or a table entry that stands for every soft 21)
+    composition = tuple(composition)
+    # Tens and face cards share one cache entry
+    upcard = RANKS[RANK_INDEX[upcard]]
+    value, soft_aces, aces = 0, 0, 0
+    for card_value in player_values:
+        rank = RANK_INDEX[card_value]
+        value, soft_aces = add_to_total(value, soft_aces, rank)
+        aces += RANKS[rank] == ACE
+    if value > TWENTYONE:
+        raise ValueError(f"Hand {player_values} is already bust")
+    if natural and len(player_values) == 2 and value == TWENTYONE:
+        return {STAND: natural_ev(upcard, composition)}
+
+    evs = {STAND: stand_ev(value, upcard, composition)}
+    if value < TWENTYONE:
+        evs[HIT] = hit_ev(value, soft_aces, aces, upcard, composition)
+    if can_increase_bet and can_double(value, aces):
+        evs[DOUBLE_DOWN] = double_ev(value, soft_aces, upcard, composition)
+    if can_increase_bet and len(player_values) == 2 and player_values[0] == player_values[1]:
+        evs[SPLIT] = split_ev(player_values[0], upcard, composition)
+    return evs
+
+
+def hand_action_evs(hand, dealer_hand, deck, bet=0, player=None):
+    # Convenience wrapper for a live game: the unseen cards are the undealt shoe plus the hole card
+    unseen = deck.cards[deck.position:] + [card for card in dealer_hand.cards if card.facedown]
+    composition = composition_from_cards(unseen)
+    can_increase_bet = player.can_increase_bet(bet) if player else True
+    # Only the first hand of the round can be a natural
+    natural = player is None or len(player.hands) == 1
+    upcard = dealer_hand.cards[1].value
+    return action_evs([card.value for card in hand.cards], upcard, composition, can_increase_bet, natural)
+
+
+def clear_cache():
+    for cached in (stand_ev, hit_ev, double_ev, best_ev):
+        cached.cache_clear()
+
+
+
+def main():
+    shoe = full_composition()
+    for player_values, upcard in [(["10", "6"], "10"), (["5", "6"], "6"), (["8", "8"], "10"), (["A", "7"], "9")]:
+        composition = remove_cards(shoe, player_values + [upcard])
+        evs = action_evs(player_values, upcard, composition)
+        moves = ", ".join(f"{move}: {ev:+.4f}" for move, ev in evs.items())
+        print(f"{' '.join(player_values)} vs {upcard}: {moves}")
+
+
+
+if __name__ == "__main__":
+    main()
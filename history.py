@@ -0,0 +1,190 @@
+"""
+Module: History
+Description: Append-only binary hand history. Every round is one fixed-width record (seed, cards,
+             decisions, bets, outcomes and bankrolls), so the reader can memory-map a file and
+             hand out each field as a zero-copy NumPy column. The reader requires numpy.
+"""
+
+
+
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from blackjack_refactor import CARD_CODES, CARDS_BY_CODE, DOUBLE_DOWN, HIT, SPLIT, STAND, SURRENDER
+
+
+
+MAGIC = b"BJHH"
+VERSION = 1
+MAX_HANDS = 8
+MAX_DEALER_CARDS = 12
+MAX_PLAYER_CARDS = 32
+MAX_DECISIONS = 32
+DECISION_CODES = {HIT: 1, STAND: 2, DOUBLE_DOWN: 3, SPLIT: 4, SURRENDER: 5}
+DECISIONS_BY_CODE = {code: decision for decision, code in DECISION_CODES.items()}
+OUTCOME_CODES = {"player": 1, "dealer": -1, None: 0, "surrender": -2}
+OUTCOMES_BY_CODE = {code: outcome for outcome, code in OUTCOME_CODES.items()}
+
+# Little-endian and packed, the struct format and the NumPy dtype describe the same bytes
+RECORD_FIELDS = [
+    ("seed", "<u8", "Q"),
+    ("round", "<u8", "Q"),
+    ("hand_count", "u1", "B"),
+    ("dealer_card_count", "u1", "B"),
+    ("player_card_count", "u1", "B"),
+    ("decision_count", "u1", "B"),
+    ("blackjack", "u1", "B"),
+    ("dealer_value", "u1", "B"),
+    ("dealer_cards", ("u1", MAX_DEALER_CARDS), f"{MAX_DEALER_CARDS}B"),
+    ("player_cards", ("u1", MAX_PLAYER_CARDS), f"{MAX_PLAYER_CARDS}B"),
+    ("hand_card_counts", ("u1", MAX_HANDS), f"{MAX_HANDS}B"),
+    ("decisions", ("u1", MAX_DECISIONS), f"{MAX_DECISIONS}B"),
+    ("outcomes", ("i1", MAX_HANDS), f"{MAX_HANDS}b"),
+    ("bets", ("<u4", MAX_HANDS), f"{MAX_HANDS}I"),
+    ("net", "<i8", "q"),
+    ("player_money", "<i8", "q"),
+    ("dealer_money", "<i8", "q"),
+]
+RECORD_DTYPE = np.dtype([(name, dtype) for name, dtype, _ in RECORD_FIELDS])
+RECORD_STRUCT = struct.Struct("<" + "".join(code for _, _, code in RECORD_FIELDS))
+# Magic, version, record size, then padding out to 16 bytes
+HEADER_STRUCT = struct.Struct("<4sII4x")
+HEADER_SIZE = HEADER_STRUCT.size
+
+
+
+def padded(values, size, what):
+    if len(values) > size:
+        raise ValueError(f"Round has {len(values)} {what}, the record only holds {size}")
+    return list(values) + [0] * (size - len(values))
+
+
+
+class HandHistoryWriter:
+    def __init__(self, path, seed=0):
+        self.path = path
+        self.seed = seed
+        self.file = open(path, "ab")
+        if self.file.tell() == 0:
+            self.file.write(HEADER_STRUCT.pack(MAGIC, VERSION, RECORD_STRUCT.size))
+            self.rounds = 0
+        else:
+            check_header(path)
+            self.rounds = (self.file.tell() - HEADER_SIZE) // RECORD_STRUCT.size
+            # Drop a record cut short by a crash, otherwise every later record would be misaligned
+            self.file.truncate(HEADER_SIZE + self.rounds * RECORD_STRUCT.size)
+            self.file.seek(0, os.SEEK_END)
+
+    def write(self, result):
+        # Takes a simulation.RoundResult
+        player_cards = [CARD_CODES[card] for hand in result.player_cards for card in hand]
+        record = RECORD_STRUCT.pack(
+            self.seed,
+            self.rounds,
+            len(result.outcomes),
+            len(result.dealer_cards),
+            len(player_cards),
+            len(result.decisions),
+            int(result.blackjack),
+            result.dealer_value,
+            *padded([CARD_CODES[card] for card in result.dealer_cards], MAX_DEALER_CARDS, "dealer cards"),
+            *padded(player_cards, MAX_PLAYER_CARDS, "player cards"),
+            *padded([len(hand) for hand in result.player_cards], MAX_HANDS, "hands"),
+            *padded([DECISION_CODES[decision] for decision in result.decisions], MAX_DECISIONS, "decisions"),
+            *padded([OUTCOME_CODES[outcome] for outcome in result.outcomes], MAX_HANDS, "hands"),
+            *padded(result.bets, MAX_HANDS, "bets"),
+            result.net,
+            result.player_money,
+            result.dealer_money,
+        )
+        self.file.write(record)
+        self.rounds += 1
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+
+def check_header(path):
+    with open(path, "rb") as file:
+        magic, version, record_size = HEADER_STRUCT.unpack(file.read(HEADER_SIZE))
+    if magic != MAGIC or version != VERSION or record_size != RECORD_STRUCT.size:
+        raise ValueError(f"{path} is not a version {VERSION} hand history file")
+
+
+
+class HandHistoryReader:
+    def __init__(self, path):
+        check_header(path)
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        # A record cut short by a crash mid-append is ignored
+        count = (size - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        if count:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.records = np.frombuffer(self.map, dtype=RECORD_DTYPE, count=count, offset=HEADER_SIZE)
+        else:
+            self.map = None
+            self.records = np.zeros(0, dtype=RECORD_DTYPE)
+
+    def __len__(self):
+        return len(self.records)
+
+    def column(self, name):
+        # A view straight onto the mapped file, nothing is copied. It stays valid after the
+        # reader closes, the map is only released once every view is gone
+        return self.records[name]
+
+    def round(self, index):
+        record = self.records[index]
+        hand_counts = record["hand_card_counts"][:record["hand_count"]]
+        player_cards = [CARDS_BY_CODE[int(code)] for code in record["player_cards"][:record["player_card_count"]]]
+        hands = []
+        start = 0
+        for count in hand_counts:
+            hands.append(player_cards[start:start + count])
+            start += count
+        return {
+            "seed": int(record["seed"]),
+            "round": int(record["round"]),
+            "dealer_cards": [CARDS_BY_CODE[int(code)] for code in record["dealer_cards"][:record["dealer_card_count"]]],
+            "dealer_value": int(record["dealer_value"]),
+            "player_cards": hands,
+            "blackjack": bool(record["blackjack"]),
+            "decisions": [DECISIONS_BY_CODE[int(code)] for code in record["decisions"][:record["decision_count"]]],
+            "bets": [int(bet) for bet in record["bets"][:record["hand_count"]]],
+            "outcomes": [OUTCOMES_BY_CODE[int(code)] for code in record["outcomes"][:record["hand_count"]]],
+            "net": int(record["net"]),
+            "player_money": int(record["player_money"]),
+            "dealer_money": int(record["dealer_money"]),
+        }
+
+    def close(self):
+        # Views into the map have to go before the map itself can close. If a caller still holds
+        # a column the map can't close yet, and is unmapped when the last view is garbage collected
+        self.records = None
+        if self.map is not None:
+            try:
+                self.map.close()
+            except BufferError:
+                pass
+            self.map = None
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,176 @@
+"""
+Module: Multiseat
+Description: Headless tables with several seats sharing one Dealer and one Deck. Cards go out
+             round-robin in casino order, each seat plays its own hands with its own strategy,
+             bettor and bankroll, the dealer plays once, and every seat is settled in one pass.
+"""
+
+
+
+import sys
+
+from blackjack_refactor import D_STARTING_CHIPS, P_STARTING_CHIPS, Dealer, Deck, Hand, Player, hand_winner
+from simulation import FlatBettor, HeadlessGame, MimicDealerStrategy, RoundResult, always_play
+from stats import StreamingStats
+
+
+
+MAX_SEATS = 7
+
+
+
+class MultiSeatGame:
+    def __init__(self, dealer: Dealer, deck: Deck):
+        self.dealer = dealer
+        self.deck = deck
+        # Each seat is a HeadlessGame over the shared dealer and deck, used for its player's turn
+        self.seats = []
+        self.dealer_start_value = 0
+
+    def add_seat(self, player: Player, strategy, bettor):
+        if len(self.seats) >= MAX_SEATS:
+            raise ValueError(f"A table only has {MAX_SEATS} seats")
+        seat = HeadlessGame(self.dealer, player, self.deck, strategy, bettor, always_play)
+        self.seats.append(seat)
+        return seat
+
+    def get_dealer_hand(self):
+        return self.dealer.hands[0]
+
+    def active_seats(self):
+        # Seats whose player went broke sit out, the way Player.set_bankrupt marks them
+        for seat in self.seats:
+            seat.player.set_bankrupt()
+        return [seat for seat in self.seats if not seat.player.bankrupt]
+
+    def is_bankrupt(self):
+        self.dealer.set_bankrupt()
+        return self.dealer.bankrupt or not self.active_seats()
+
+    def start_round(self):
+        if self.deck.needs_shuffle():
+            self.deck.shuffle()
+        seats = self.active_seats()
+        for seat in seats:
+            seat.bet = seat.get_bet()
+            seat.bets = [seat.bet]
+            seat.decisions = []
+            seat.hand_winners = []
+            seat.player.hands = [Hand()]
+
+        # Casino order: a card to every seat, the dealer's upcard, a second card each, the hole card
+        for seat in seats:
+            seat.player.deal_card(self.deck)
+        upcard = self.deck.draw_card()
+        upcard.flip_card()
+        self.deck.card_exposed(upcard)
+        for seat in seats:
+            seat.player.deal_card(self.deck)
+        # The hole card still goes first in the dealer's hand, like Dealer.start_new_hand
+        dealer_hand = Hand()
+        dealer_hand.add_card(self.deck.draw_card())
+        dealer_hand.add_card(upcard)
+        self.dealer.hands = [dealer_hand]
+        self.dealer_start_value = dealer_hand.value
+
+        for seat in seats:
+            seat.natural = seat.player.hands[0].blackjack()
+        return seats
+
+    def dealer_turn(self):
+        self.dealer.play_out(self.deck)
+
+    def settle(self, seats):
+        # Every hand at the table is settled against the same dealer total, and the
+        # dealer's bankroll moves once for the whole round
+        dealer_value = self.get_dealer_hand().value
+        results = {}
+        table_net = 0
+        for seat in seats:
+            player = seat.player
+            starting_money = player.money
+            # A natural ends that seat's round before the dealer draws, as in HeadlessGame
+            against = self.dealer_start_value if seat.natural else dealer_value
+            for hand, bet in zip(player.hands, seat.bets):
+                winner = hand_winner(hand.value, against)
+                seat.hand_winners.append(winner)
+                if winner == "player":
+                    player.win_bet(bet)
+                elif winner == "dealer":
+                    player.lose_bet(bet)
+            net = player.money - starting_money
+            table_net += net
+            results[seat] = RoundResult(
+                bets=list(seat.bets),
+                outcomes=list(seat.hand_winners),
+                player_values=[hand.value for hand in player.hands],
+                dealer_value=against,
+                blackjack=seat.natural,
+                decisions=list(seat.decisions),
+                net=net,
+                player_money=player.money,
+                dealer_money=0,
+                dealer_cards=[(card.value, card.suit) for card in self.get_dealer_hand().cards],
+                player_cards=[[(card.value, card.suit) for card in hand.cards] for hand in player.hands],
+                bet=seat.bet,
+            )
+        self.dealer.lose_bet(table_net)
+
+        for seat in seats:
+            for current_hand in range(len(seat.player.hands)):
+                seat.player.discard_cards(self.deck, current_hand)
+            results[seat].dealer_money = self.dealer.money
+        self.dealer.discard_cards(self.deck)
+        return results
+
+    def play_round(self):
+        # One RoundResult per seat in seat order, None for a seat sitting out
+        seats = self.start_round()
+        live = False
+        for seat in seats:
+            if not seat.natural:
+                live = not seat.player_turn() or live
+        # The dealer only draws if some hand is still waiting on the dealer's total
+        if live:
+            self.dealer_turn()
+        results = self.settle(seats)
+        return [results.get(seat) for seat in self.seats]
+
+    def run(self, rounds):
+        for _ in range(rounds):
+            if self.is_bankrupt():
+                return
+            yield self.play_round()
+
+
+
+def new_multiseat_game(seats, player_money=P_STARTING_CHIPS, dealer_money=D_STARTING_CHIPS,
+                       decks=1, penetration=1.0, rng=None):
+    # seats: list of (strategy, bettor) pairs, filled left to right
+    game = MultiSeatGame(Dealer(dealer_money), Deck(decks, penetration, verbose=False, rng=rng))
+    for strategy, bettor in seats:
+        game.add_seat(Player(player_money), strategy, bettor)
+    return game
+
+
+
+def main():
+    # python multiseat.py [SEATS] [ROUNDS]
+    seat_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    game = new_multiseat_game([(MimicDealerStrategy(), FlatBettor(1)) for _ in range(seat_count)],
+                              10 ** 9, 10 ** 9, decks=6, penetration=0.75)
+    seat_stats = [StreamingStats() for _ in range(seat_count)]
+    for results in game.run(rounds):
+        for stats, result in zip(seat_stats, results):
+            if result is not None:
+                stats.add(result)
+    for seat, stats in enumerate(seat_stats, start=1):
+        report = stats.report()
+        print(f"Seat {seat}: rounds {report['rounds']} net {report['net']} ev {report['ev_per_round']:.4f}")
+    print(f"Dealer: {game.dealer.money - 10 ** 9:+}")
+
+
+
+if __name__ == "__main__":
+    main()
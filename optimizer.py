@@ -0,0 +1,167 @@
+"""
+Module: Optimizer
+Description: Searches bet spreads and count-based deviations by racing them against each other.
+             Every stage plays all surviving candidates on the same worker seeds in parallel,
+             drops the ones whose EV interval lies wholly below the leader's, and doubles the
+             rounds for whoever is left, so clear losers never get the full sample.
+"""
+
+
+
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from blackjack_refactor import STAND
+from counting import DeviationStrategy, SpreadBettor, attach_counter
+from parallel import SIMULATION_BANKROLL, derive_seed, new_stats, split_rounds
+from simulation import MimicDealerStrategy, always_play, new_headless_game
+from stats import Z_95
+
+
+
+FIRST_STAGE_ROUNDS = 20000
+GROWTH = 2
+MAX_CANDIDATE_ROUNDS = 2000000
+
+
+
+class Candidate:
+    # Everything needed to rebuild the strategy and bettor inside a worker, next to its own deck
+    def __init__(self, name, system="hi-lo", unit=1, max_units=1, deviations=None, strategy=None):
+        self.name = name
+        self.system = system
+        self.unit = unit
+        self.max_units = max_units
+        self.deviations = deviations or {}
+        self.strategy = strategy
+
+    def build(self, deck):
+        counter = attach_counter(deck, self.system)
+        strategy = self.strategy or MimicDealerStrategy()
+        if self.deviations:
+            strategy = DeviationStrategy(strategy, counter, deck, self.deviations)
+        return strategy, SpreadBettor(counter, deck, self.unit, self.max_units)
+
+
+
+def evaluate(job):
+    candidate, seed, rounds, decks, penetration = job
+    game = new_headless_game(None, None, always_play, SIMULATION_BANKROLL, SIMULATION_BANKROLL,
+                             decks, penetration, random.Random(seed))
+    game.strategy, game.bettor = candidate.build(game.deck)
+    stats = new_stats()
+    for result in game.run(rounds):
+        stats.add(result)
+    return stats
+
+
+
+class RacingOptimizer:
+    def __init__(self, candidates, decks=6, penetration=0.75, workers=None, master_seed=0,
+                 first_stage_rounds=FIRST_STAGE_ROUNDS, growth=GROWTH, max_rounds=MAX_CANDIDATE_ROUNDS, z=Z_95):
+        names = [candidate.name for candidate in candidates]
+        if len(set(names)) != len(names):
+            raise ValueError("Candidate names must be unique")
+        self.candidates = {candidate.name: candidate for candidate in candidates}
+        self.decks = decks
+        self.penetration = penetration
+        self.workers = workers or os.cpu_count() or 1
+        self.master_seed = master_seed
+        self.first_stage_rounds = first_stage_rounds
+        self.growth = growth
+        self.max_rounds = max_rounds
+        self.z = z
+        self.stats = {name: new_stats() for name in names}
+        self.survivors = list(names)
+        # name -> stage it was dropped in
+        self.eliminated = {}
+        self.stage = 0
+
+    def run_stage(self, pool, rounds):
+        # Every candidate gets the same seeds this stage, so they are compared on the same shoes
+        chunks = split_rounds(rounds, self.workers)
+        seeds = [derive_seed(self.master_seed, f"{self.stage}:{index}") for index in range(len(chunks))]
+        jobs = [
+            (self.candidates[name], seed, chunk, self.decks, self.penetration)
+            for name in self.survivors for seed, chunk in zip(seeds, chunks) if chunk
+        ]
+        results = pool.map(evaluate, jobs) if pool else map(evaluate, jobs)
+        per_candidate = len([chunk for chunk in chunks if chunk])
+        for index, stats in enumerate(results):
+            self.stats[self.survivors[index // per_candidate]].merge(stats)
+
+    def interval(self, name):
+        return self.stats[name].round_net.confidence_interval(self.z)
+
+    def eliminate(self):
+        leader = max(self.survivors, key=lambda name: self.stats[name].round_net.mean)
+        leader_low = self.interval(leader)[0]
+        for name in list(self.survivors):
+            if name != leader and self.interval(name)[1] < leader_low:
+                self.survivors.remove(name)
+                self.eliminated[name] = self.stage
+
+    def run(self):
+        rounds = self.first_stage_rounds
+        pool = ProcessPoolExecutor(self.workers) if self.workers > 1 else None
+        try:
+            while True:
+                self.run_stage(pool, rounds)
+                self.eliminate()
+                self.stage += 1
+                played = self.stats[self.survivors[0]].rounds
+                if len(self.survivors) == 1 or played >= self.max_rounds:
+                    break
+                rounds = min(rounds * self.growth, self.max_rounds - played)
+        finally:
+            if pool:
+                pool.shutdown()
+        return self.report()
+
+    def report(self):
+        candidates = {}
+        for name, stats in self.stats.items():
+            candidates[name] = {
+                "rounds": stats.rounds,
+                "ev_per_round": stats.round_net.mean,
+                "ev_per_round_ci": list(self.interval(name)),
+                "ev_per_unit_wagered": stats.net / stats.wagered if stats.wagered else 0.0,
+                "eliminated_in_stage": self.eliminated.get(name),
+            }
+        best = max(self.survivors, key=lambda name: self.stats[name].round_net.mean)
+        return {
+            "best": best,
+            "survivors": list(self.survivors),
+            "stages": self.stage,
+            "total_rounds": sum(stats.rounds for stats in self.stats.values()),
+            "candidates": candidates,
+        }
+
+
+
+def spread_candidates(system="hi-lo", spreads=(1, 2, 4, 8, 12), deviations=None):
+    # One candidate per maximum bet, with and without the deviations if any are given
+    candidates = [Candidate(f"{system} 1-{units}", system, 1, units) for units in spreads]
+    if deviations:
+        candidates += [Candidate(f"{system} 1-{units} dev", system, 1, units, deviations) for units in spreads]
+    return candidates
+
+
+
+def main():
+    # python optimizer.py [WORKERS]
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    # Standing on 16 against a ten once the count says the shoe is rich in tens
+    deviations = {("hard", 16, "10"): (0, STAND), ("hard", 15, "10"): (4, STAND)}
+    optimizer = RacingOptimizer(spread_candidates(deviations=deviations), workers=workers, max_rounds=500000)
+    report = optimizer.run()
+    for name, entry in report["candidates"].items():
+        print(f"{name}: {entry}")
+    print(f"best: {report['best']} after {report['stages']} stages, {report['total_rounds']} rounds in total")
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Module: Paired
+Description: Compares strategies and betting policies with common random numbers. Every variant
+             plays each round from the same shuffled shoe, and the dealer draws from the bottom
+             of it, so a split or double on one side can't push the dealer onto different cards.
+             Reports each variant's EV and the paired difference against the first variant.
+"""
+
+
+
+import random
+import sys
+
+from blackjack_refactor import HIT, STAND, Dealer, Deck, Player
+from parallel import SIMULATION_BANKROLL, derive_seed
+from simulation import FlatBettor, HeadlessGame, MimicDealerStrategy, always_play
+from stats import RunningMoments
+
+
+
+class AlignedDeck(Deck):
+    # Every round gets a fresh shuffle from (seed, round), so all variants see the same shoe
+    # however many cards earlier rounds used. The player and the initial deal take cards
+    # from the top, the dealer's hits come from the bottom.
+    def __init__(self, decks=1, seed=0):
+        super().__init__(decks, verbose=False, rng=random.Random(seed))
+        self.seed = seed
+        self.round = 0
+        self.ordered = list(self.cards)
+        self.bottom = len(self.cards)
+        self.dealer_drawing = False
+
+    def new_round(self):
+        self.cards = list(self.ordered)
+        random.Random(derive_seed(self.seed, self.round)).shuffle(self.cards)
+        self.position = 0
+        self.bottom = len(self.cards)
+        self.discard_pile.clear()
+        self.round += 1
+
+    def needs_shuffle(self):
+        return False
+
+    def draw_card(self):
+        if self.position >= self.bottom:
+            raise ValueError("One round used up the whole shoe")
+        if self.dealer_drawing:
+            self.bottom -= 1
+            return self.cards[self.bottom]
+        card_being_dealt = self.cards[self.position]
+        self.position += 1
+        return card_being_dealt
+
+
+
+class PairedGame(HeadlessGame):
+    def start_round(self):
+        self.deck.new_round()
+        super().start_round()
+
+    def dealer_turn(self):
+        self.deck.dealer_drawing = True
+        try:
+            super().dealer_turn()
+        finally:
+            self.deck.dealer_drawing = False
+
+
+
+def new_paired_game(strategy, bettor, seed=0, decks=1, player_money=SIMULATION_BANKROLL,
+                    dealer_money=SIMULATION_BANKROLL):
+    # Bankrolls big enough that no variant stops early and the rounds stay paired
+    return PairedGame(Dealer(dealer_money), Player(player_money), AlignedDeck(decks, seed),
+                      strategy, bettor, always_play)
+
+
+
+class PairedComparison:
+    def __init__(self, variants, seed=0, decks=1):
+        # variants: list of (name, strategy, bettor), the first one is the baseline
+        if len(variants) < 2:
+            raise ValueError("A paired comparison needs at least two variants")
+        self.names = [name for name, _, _ in variants]
+        self.games = [new_paired_game(strategy, bettor, seed, decks) for _, strategy, bettor in variants]
+        self.nets = [RunningMoments() for _ in variants]
+        self.differences = [RunningMoments() for _ in variants[1:]]
+
+    def play_round(self):
+        nets = [game.play_round().net for game in self.games]
+        for moments, net in zip(self.nets, nets):
+            moments.add(net)
+        for moments, net in zip(self.differences, nets[1:]):
+            moments.add(net - nets[0])
+
+    def run(self, rounds):
+        for _ in range(rounds):
+            self.play_round()
+        return self.report()
+
+    def report(self):
+        baseline = self.nets[0]
+        report = {"rounds": baseline.count, "baseline": self.names[0], "variants": {}}
+        for index, name in enumerate(self.names):
+            moments = self.nets[index]
+            entry = {
+                "ev_per_round": moments.mean,
+                "variance_per_round": moments.variance(),
+                "ev_per_round_ci95": list(moments.confidence_interval()),
+            }
+            if index:
+                difference = self.differences[index - 1]
+                unpaired = moments.variance() + baseline.variance()
+                entry.update({
+                    "ev_difference": difference.mean,
+                    "ev_difference_ci95": list(difference.confidence_interval()),
+                    "variance_difference": moments.variance() - baseline.variance(),
+                    "paired_variance": difference.variance(),
+                    # How many times more rounds two unpaired runs would need for the same interval
+                    "variance_reduction": unpaired / difference.variance() if difference.variance() else float("inf"),
+                })
+            report["variants"][name] = entry
+        return report
+
+
+
+class StandOnStrategy:
+    # Hits below a fixed total, MimicDealerStrategy with a different threshold
+    def __init__(self, stand_on):
+        self.stand_on = stand_on
+
+    def choose(self, hand, choices, dealer_upcard, bet):
+        return HIT if hand.value < self.stand_on else STAND
+
+
+
+def main():
+    # python paired.py [ROUNDS]: mimic the dealer against standing on 12 and on 15
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    comparison = PairedComparison([
+        ("mimic dealer", MimicDealerStrategy(), FlatBettor(1)),
+        ("stand on 12", StandOnStrategy(12), FlatBettor(1)),
+        ("stand on 15", StandOnStrategy(15), FlatBettor(1)),
+    ], seed=2024)
+    report = comparison.run(rounds)
+    print(f"rounds: {report['rounds']}")
+    for name, entry in report["variants"].items():
+        print(name)
+        for key, value in entry.items():
+            print(f"  {key}: {value}")
+
+
+
+if __name__ == "__main__":
+    main()
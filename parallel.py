@@ -0,0 +1,108 @@
+"""
+Module: Parallel
+Description: Spreads headless rounds across worker processes. Every worker gets its own RNG
+             streams derived from one master seed, so a report is reproducible for a given
+             master seed and worker count. A strategy or bettor that makes random choices
+             has to keep its random.Random in .rng, which each worker reseeds from its own stream.
+"""
+
+
+
+import copy
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from simulation import FlatBettor, MimicDealerStrategy, always_play, new_headless_game
+from stats import StreamingStats
+
+
+
+# Large enough that nobody goes bankrupt during an EV run
+SIMULATION_BANKROLL = 10 ** 12
+# Bankroll histogram covers this far either side of the starting bankroll
+BANKROLL_SPREAD = 10000
+BANKROLL_BINS = 200
+
+
+
+def derive_seed(master_seed, worker_index):
+    # String seeds are hashed with SHA-512, so streams don't depend on PYTHONHASHSEED
+    return random.Random(f"{master_seed}:{worker_index}").getrandbits(64)
+
+
+def reseed_players(strategy, bettor, seed):
+    # Each worker has its own copy of the strategy and bettor, and without this every copy
+    # would replay the same random choices. Anything without an .rng is left alone
+    for name, player in (("strategy", strategy), ("bettor", bettor)):
+        rng = getattr(player, "rng", None)
+        if isinstance(rng, random.Random):
+            rng.seed(derive_seed(seed, name))
+
+
+def split_rounds(rounds, workers):
+    base, extra = divmod(rounds, workers)
+    return [base + (1 if index < extra else 0) for index in range(workers)]
+
+
+def new_stats():
+    return StreamingStats(SIMULATION_BANKROLL - BANKROLL_SPREAD, SIMULATION_BANKROLL + BANKROLL_SPREAD, BANKROLL_BINS)
+
+
+def run_worker(job):
+    seed, rounds, strategy, bettor, decks, penetration = job
+    # The copy a pool worker would unpickle, so a single in-process worker doesn't reseed the caller's
+    strategy, bettor = copy.deepcopy((strategy, bettor))
+    reseed_players(strategy, bettor, seed)
+    game = new_headless_game(
+        strategy,
+        bettor,
+        always_play,
+        SIMULATION_BANKROLL,
+        SIMULATION_BANKROLL,
+        decks,
+        penetration,
+        random.Random(seed),
+    )
+    stats = new_stats()
+    for result in game.run(rounds):
+        stats.add(result)
+    return stats
+
+
+def run_parallel(rounds, workers=None, master_seed=0, strategy=None, bettor=None, decks=1, penetration=1.0):
+    workers = workers or os.cpu_count() or 1
+    strategy = strategy or MimicDealerStrategy()
+    bettor = bettor or FlatBettor()
+    jobs = [
+        (derive_seed(master_seed, index), worker_rounds, strategy, bettor, decks, penetration)
+        for index, worker_rounds in enumerate(split_rounds(rounds, workers))
+    ]
+
+    if workers == 1:
+        worker_stats = [run_worker(jobs[0])]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            # map keeps worker order, so the merge below is always done the same way
+            worker_stats = list(pool.map(run_worker, jobs))
+
+    total = new_stats()
+    for stats in worker_stats:
+        total.merge(stats)
+    return total
+
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    report = run_parallel(rounds, workers).report()
+    for key, value in report.items():
+        if key != "bankroll_histogram":
+            print(f"{key}: {value}")
+
+
+
+if __name__ == "__main__":
+    main()
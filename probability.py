@@ -0,0 +1,117 @@
+"""
+Module: Probability
+Description: Exact dealer outcome probabilities for a given upcard and remaining shoe. Shoes are
+             counted by rank instead of listed card by card, and the recursion over those counts
+             is memoized in a bounded cache so similar shoe states reuse earlier work.
+"""
+
+
+
+from functools import lru_cache
+
+from blackjack_refactor import ACE, ACE_DIFF, DEALER_LIMIT, SUITS, TWENTYONE, VALUES, VAL_DICT
+
+
+
+# A shoe composition is a tuple of counts: aces, twos through nines, then every ten-valued card
+RANKS = ["A", "2", "3", "4", "5", "6", "7", "8", "9", "10"]
+RANK_VALUES = [VAL_DICT[rank] for rank in RANKS]
+# Tens and face cards all share the last slot
+RANK_INDEX = {value: min(VALUES.index(value), len(RANKS) - 1) for value in VALUES}
+BUST = "bust"
+BLACKJACK = "blackjack"
+DEALER_OUTCOMES = [17, 18, 19, 20, 21, BUST, BLACKJACK]
+DEALER_CACHE_SIZE = 2 ** 18
+
+
+
+def full_composition(decks=1):
+    composition = [0] * len(RANKS)
+    for value in VALUES:
+        composition[RANK_INDEX[value]] += len(SUITS) * decks
+    return tuple(composition)
+
+
+def composition_from_cards(cards):
+    composition = [0] * len(RANKS)
+    for card in cards:
+        composition[RANK_INDEX[card.value]] += 1
+    return tuple(composition)
+
+
+def shoe_composition(deck):
+    # Only the undealt part of the shoe
+    return composition_from_cards(deck.cards[deck.position:])
+
+
+def remove_cards(composition, values):
+    composition = list(composition)
+    for value in values:
+        rank = RANK_INDEX[value]
+        if not composition[rank]:
+            raise ValueError(f"No {value} left in the shoe to remove")
+        composition[rank] -= 1
+    return tuple(composition)
+
+
+def add_to_total(value, soft_aces, rank):
+    # Same adjustment as Hand.add_card, a hand at 21 or under has at most one soft ace
+    value += RANK_VALUES[rank]
+    soft_aces += RANKS[rank] == ACE
+    while value > TWENTYONE and soft_aces:
+        value -= ACE_DIFF
+        soft_aces -= 1
+    return value, soft_aces
+
+
+@lru_cache(maxsize=DEALER_CACHE_SIZE)
+def dealer_outcomes(value, soft_aces, cards, composition):
+    # Returns probabilities in DEALER_OUTCOMES order for a dealer hand still to be played
+    if value > TWENTYONE:
+        return (0.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0)
+    if value >= DEALER_LIMIT:
+        outcome = [0.0] * len(DEALER_OUTCOMES)
+        if value == TWENTYONE and cards == 2:
+            outcome[-1] = 1.0
+        else:
+            outcome[value - DEALER_LIMIT] = 1.0
+        return tuple(outcome)
+
+    remaining = sum(composition)
+    if not remaining:
+        # The engine reshuffles when the shoe runs dry, so keep drawing from a fresh deck
+        composition = full_composition()
+        remaining = sum(composition)
+
+    totals = [0.0] * len(DEALER_OUTCOMES)
+    for rank, count in enumerate(composition):
+        if not count:
+            continue
+        chance = count / remaining
+        next_value, next_soft = add_to_total(value, soft_aces, rank)
+        next_composition = composition[:rank] + (count - 1,) + composition[rank + 1:]
+        for index, probability in enumerate(dealer_outcomes(next_value, next_soft, min(cards + 1, 3), next_composition)):
+            totals[index] += chance * probability
+    return tuple(totals)
+
+
+def dealer_probabilities(upcard, composition):
+    # upcard is a card value like "A" or "K", composition is what's left after the upcard is out
+    rank = RANK_INDEX[upcard]
+    value, soft_aces = add_to_total(0, 0, rank)
+    return dict(zip(DEALER_OUTCOMES, dealer_outcomes(value, soft_aces, 1, tuple(composition))))
+
+
+
+def main():
+    composition = full_composition()
+    for upcard in RANKS:
+        probabilities = dealer_probabilities(upcard, remove_cards(composition, [upcard]))
+        row = " ".join(f"{probabilities[outcome]:.4f}" for outcome in DEALER_OUTCOMES)
+        print(f"{upcard:>2}: {row}")
+    print(dealer_outcomes.cache_info())
+
+
+
+if __name__ == "__main__":
+    main()
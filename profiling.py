@@ -0,0 +1,149 @@
+"""
+Module: Profiling
+Description: Opt-in timing and counters for the round lifecycle. attach_profiler wraps one game's
+             start_round, player_turn, dealer_turn and end_round (and its deck and player) on that
+             instance only, so games without a profiler run exactly the code they always did.
+"""
+
+
+
+import json
+import time
+from bisect import bisect_left
+
+from blackjack_refactor import DOUBLE_DOWN, SPLIT, Game
+
+
+
+PHASES = ["start_round", "player_turn", "dealer_turn", "end_round"]
+# Upper bounds in seconds, the last bucket catches everything slower
+BUCKETS = [0.000001, 0.000005, 0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, float("inf")]
+METRIC_PREFIX = "blackjack"
+
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def to_dict(self):
+        return {
+            "buckets": {str(bound): count for bound, count in zip(self.buckets, self.counts)},
+            "sum": self.total,
+            "count": self.count,
+        }
+
+
+
+class RoundProfiler:
+    def __init__(self):
+        self.phases = {phase: Histogram() for phase in PHASES}
+        self.cards_drawn = 0
+        self.reshuffles = 0
+        self.decisions = 0
+        self.splits = 0
+        self.doubles = 0
+
+    def record_choice(self, choice):
+        self.decisions += 1
+        if choice == SPLIT:
+            self.splits += 1
+        elif choice == DOUBLE_DOWN:
+            self.doubles += 1
+
+    def decisions_per_second(self):
+        seconds = self.phases["player_turn"].total
+        return self.decisions / seconds if seconds else 0.0
+
+    def to_dict(self):
+        return {
+            "phases": {phase: histogram.to_dict() for phase, histogram in self.phases.items()},
+            "cards_drawn": self.cards_drawn,
+            "reshuffles": self.reshuffles,
+            "decisions": self.decisions,
+            "splits": self.splits,
+            "doubles": self.doubles,
+            "decisions_per_second": self.decisions_per_second(),
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self):
+        # Prometheus text exposition format, buckets are cumulative
+        name = f"{METRIC_PREFIX}_phase_seconds"
+        lines = [f"# HELP {name} Wall time spent in each round phase.", f"# TYPE {name} histogram"]
+        for phase, histogram in self.phases.items():
+            running = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                running += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{name}_bucket{{phase="{phase}",le="{le}"}} {running}')
+            lines.append(f'{name}_sum{{phase="{phase}"}} {histogram.total}')
+            lines.append(f'{name}_count{{phase="{phase}"}} {histogram.count}')
+        counters = [
+            ("cards_drawn", "Cards drawn from the shoe.", self.cards_drawn),
+            ("reshuffles", "Times the shoe was reshuffled.", self.reshuffles),
+            ("decisions", "Player decisions made.", self.decisions),
+            ("splits", "Pairs split.", self.splits),
+            ("doubles", "Hands doubled down.", self.doubles),
+        ]
+        for counter, help_text, value in counters:
+            lines.append(f"# HELP {METRIC_PREFIX}_{counter}_total {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{counter}_total counter")
+            lines.append(f"{METRIC_PREFIX}_{counter}_total {value}")
+        lines.append(f"# HELP {METRIC_PREFIX}_decisions_per_second Decisions per second of player turn time.")
+        lines.append(f"# TYPE {METRIC_PREFIX}_decisions_per_second gauge")
+        lines.append(f"{METRIC_PREFIX}_decisions_per_second {self.decisions_per_second()}")
+        return "\n".join(lines) + "\n"
+
+
+
+def timed(method, histogram):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - start)
+    return wrapper
+
+
+def counted(method, on_call):
+    def wrapper(*args, **kwargs):
+        result = method(*args, **kwargs)
+        on_call(result)
+        return result
+    return wrapper
+
+
+def attach_profiler(game: Game, profiler=None):
+    profiler = profiler or RoundProfiler()
+    for phase in PHASES:
+        setattr(game, phase, timed(getattr(game, phase), profiler.phases[phase]))
+
+    def card_drawn(card):
+        profiler.cards_drawn += 1
+
+    def reshuffled(result):
+        profiler.reshuffles += 1
+
+    # Instance attributes shadow the class methods, so only this game's deck is touched
+    game.deck.draw_card = counted(game.deck.draw_card, card_drawn)
+    game.deck.shuffle = counted(game.deck.shuffle, reshuffled)
+    # Headless games decide through a strategy, interactive ones through Player.take_turn.
+    # The strategy object itself is wrapped, so don't share one between profiled games
+    decider = getattr(game, "strategy", None)
+    if decider is not None:
+        decider.choose = counted(decider.choose, profiler.record_choice)
+    else:
+        game.player.take_turn = counted(game.player.take_turn, profiler.record_choice)
+    return profiler
@@ -0,0 +1,171 @@
+"""
+Module: Replay
+Description: Re-runs a session exactly from its seed and decision log. The shoe is shuffled by a
+             random.Random seeded with the session seed, so the same bets and decisions give the
+             same cards every time, and any round can be reached without rendering or prompts.
+             Live sessions, from blackjack_refactor.py or server.py, replay through Game's own
+             round so their money matches what the player saw.
+"""
+
+
+
+import random
+import sys
+
+from blackjack_refactor import (
+    D_STARTING_CHIPS,
+    P_STARTING_CHIPS,
+    Dealer,
+    Deck,
+    Game,
+    Hand,
+    Player,
+    SessionLog,
+    TableRenderer,
+)
+from simulation import RoundResult, always_play, new_headless_game
+
+
+
+class ReplayDecisions:
+    # Both the bettor and the strategy for a replayed game, fed from the log one round at a time
+    def __init__(self, log: SessionLog):
+        self.log = log
+        self.round = 0
+        self.pending = []
+
+    def get_bet(self, player):
+        if self.round >= len(self.log.rounds):
+            raise IndexError(f"Log only has {len(self.log.rounds)} rounds")
+        bet, decisions = self.log.rounds[self.round]
+        self.pending = list(reversed(decisions))
+        self.round += 1
+        return bet
+
+    def choose(self, hand, choices, dealer_upcard, bet):
+        if not self.pending:
+            raise ValueError(f"Round {self.round - 1} needs more decisions than the log recorded")
+        return self.pending.pop()
+
+
+
+class ReplayPlayer(Player):
+    def __init__(self, money, decisions: ReplayDecisions):
+        super().__init__(money)
+        self.decisions = decisions
+
+    def take_turn(self, hand: Hand, bet):
+        return self.decisions.choose(hand, self.get_choices(hand, bet), None, bet)
+
+
+
+class ReplayTableGame(Game):
+    # Plays a live session's rounds the way blackjack_refactor.main did, minus the prompts
+    def __init__(self, log: SessionLog, renderer=None):
+        self.replay = ReplayDecisions(log)
+        super().__init__(
+            Dealer(log.dealer_money),
+            ReplayPlayer(log.player_money, self.replay),
+            Deck(log.decks, log.penetration, verbose=False, rng=random.Random(log.seed)),
+            None,
+            renderer or TableRenderer(silent=True),
+        )
+        self.dealer_pause = None
+        self.result = None
+
+    def get_bet(self):
+        return self.replay.get_bet(self.player)
+
+    def set_play_again(self):
+        self.play_again = True
+
+    def settle_hands(self):
+        # Cards and values are read before Game.settle_hands discards them
+        dealer_hand = self.get_dealer_hand()
+        starting_money = self.player.money
+        dealer_cards = [(card.value, card.suit) for card in dealer_hand.cards]
+        player_cards = [[(card.value, card.suit) for card in hand.cards] for hand in self.player.hands]
+        player_values = [hand.value for hand in self.player.hands]
+        blackjack = self.player.hands[0].blackjack()
+        dealer_value = dealer_hand.value
+        super().settle_hands()
+        # Game stakes one shared bet on every hand
+        self.result = RoundResult(
+            bets=[self.bet] * len(player_values),
+            outcomes=list(self.hand_winners),
+            player_values=player_values,
+            dealer_value=dealer_value,
+            blackjack=blackjack,
+            decisions=list(self.decisions),
+            net=self.player.money - starting_money,
+            player_money=self.player.money,
+            dealer_money=self.dealer.money,
+            dealer_cards=dealer_cards,
+            player_cards=player_cards,
+            bet=self.opening_bet,
+        )
+
+    def play_round(self) -> RoundResult:
+        # One pass of blackjack_refactor.play_session's loop
+        self.start_round()
+        if self.player.hands[0].blackjack():
+            self.renderer.message("BLACKJACK!")
+        else:
+            player_busted = self.player_turn()
+            if not player_busted and not self.is_bankrupt():
+                self.dealer_turn()
+                if self.get_dealer_hand().bust():
+                    self.renderer.message("The dealer BUSTED!")
+        self.end_round()
+        return self.result
+
+
+
+def new_recorded_game(seed, strategy, bettor, decks=1, penetration=1.0,
+                      player_money=P_STARTING_CHIPS, dealer_money=D_STARTING_CHIPS, play_again=always_play):
+    # A headless game with a seeded shoe, and the log its rounds should be recorded into
+    log = SessionLog(seed, decks, penetration, player_money, dealer_money)
+    game = new_headless_game(strategy, bettor, play_again, player_money, dealer_money,
+                             decks, penetration, random.Random(seed))
+    return game, log
+
+
+def replay_game(log: SessionLog, renderer=None):
+    if log.table == "live":
+        return ReplayTableGame(log, renderer)
+    decisions = ReplayDecisions(log)
+    return new_headless_game(decisions, decisions, always_play, log.player_money, log.dealer_money,
+                             log.decks, log.penetration, random.Random(log.seed), renderer)
+
+
+def fast_forward(log: SessionLog, round_number):
+    # Plays rounds 0 to round_number - 1 silently and returns the game about to deal round_number.
+    # Every round still has to be played because the discard order feeds the next shuffle
+    game = replay_game(log)
+    for _ in range(round_number):
+        game.play_round()
+    return game
+
+
+def replay_round(log: SessionLog, round_number, renderer=None):
+    # Jump straight to one round and play it, shown on renderer if one is given
+    game = fast_forward(log, round_number)
+    if renderer is not None:
+        game.renderer = renderer
+    return game, game.play_round()
+
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Usage: python replay.py SESSION_LOG ROUND")
+        return
+    log = SessionLog.load(sys.argv[1])
+    game, result = replay_round(log, int(sys.argv[2]), TableRenderer())
+    print(result)
+    game.print_money()
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Module: Ruin
+Description: Estimates risk of ruin by running thousands of bankroll trajectories at once on the
+             batch engine. A trajectory ends the way Game.is_bankrupt ends a session, when either
+             bankroll hits zero, and batches keep coming only until the risk-of-ruin confidence
+             interval is as narrow as asked. Requires numpy.
+"""
+
+
+
+import math
+import sys
+
+import numpy as np
+
+from batch import BatchGame
+from blackjack_refactor import D_STARTING_CHIPS, DEALER_LIMIT, P_STARTING_CHIPS
+from stats import Z_95
+
+
+
+DEFAULT_WIDTH = 0.01
+BATCH_TRAJECTORIES = 4096
+MAX_SESSION_ROUNDS = 100000
+DRAWDOWN_QUANTILES = [0.5, 0.9, 0.95, 0.99]
+
+
+
+class FlatBetPolicy:
+    # Vectorised counterpart of simulation.FlatBettor, never more than the player holds
+    def __init__(self, amount=10):
+        self.amount = amount
+
+    def get_bets(self, bankrolls):
+        return np.minimum(self.amount, bankrolls)
+
+
+
+class FractionBetPolicy:
+    # Bets a fixed share of the current bankroll, at least one chip
+    def __init__(self, fraction=0.05):
+        self.fraction = fraction
+
+    def get_bets(self, bankrolls):
+        return np.minimum(np.maximum((bankrolls * self.fraction).astype(np.int64), 1), bankrolls)
+
+
+
+def wilson_interval(successes, trials, z=Z_95):
+    if not trials:
+        return 0.0, 1.0
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+
+class RuinAnalyzer:
+    def __init__(self, policy=None, player_money=P_STARTING_CHIPS, dealer_money=D_STARTING_CHIPS,
+                 decks=1, stand_on=DEALER_LIMIT, max_rounds=MAX_SESSION_ROUNDS, seed=None):
+        self.policy = policy or FlatBetPolicy()
+        self.player_money = player_money
+        self.dealer_money = dealer_money
+        self.decks = decks
+        self.stand_on = stand_on
+        self.max_rounds = max_rounds
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.trajectories = 0
+        self.ruined = 0
+        self.dealer_broke = 0
+        self.batches = 0
+        self.session_lengths = []
+        self.drawdowns = []
+
+    def run_batch(self, trajectories=BATCH_TRAJECTORIES):
+        # Every trajectory is its own table with its own shoe, all stepped together
+        game = BatchGame(trajectories, self.decks, self.stand_on, self.seed_sequence.spawn(1)[0])
+        player = np.full(trajectories, self.player_money, dtype=np.int64)
+        dealer = np.full(trajectories, self.dealer_money, dtype=np.int64)
+        peak = player.copy()
+        drawdown = np.zeros(trajectories, dtype=np.int64)
+        length = np.zeros(trajectories, dtype=np.int64)
+        playing = np.ones(trajectories, dtype=bool)
+
+        for _ in range(self.max_rounds):
+            # Finished trajectories ride along with a zero bet
+            bets = np.where(playing, self.policy.get_bets(player), 0)
+            net = game.play_round(bets) * bets
+            player += net
+            dealer -= net
+            length += playing
+            np.maximum(peak, player, out=peak)
+            np.maximum(drawdown, peak - player, out=drawdown)
+            # Player.set_bankrupt and Dealer.set_bankrupt: money at or below zero
+            playing &= (player > 0) & (dealer > 0)
+            if not playing.any():
+                break
+
+        self.trajectories += trajectories
+        self.ruined += int((player <= 0).sum())
+        self.dealer_broke += int((dealer <= 0).sum())
+        self.batches += 1
+        self.session_lengths.append(length)
+        self.drawdowns.append(drawdown)
+
+    def confidence_interval(self):
+        return wilson_interval(self.ruined, self.trajectories)
+
+    def run(self, width=DEFAULT_WIDTH, max_trajectories=10 ** 7, trajectories=BATCH_TRAJECTORIES):
+        # Sequential stopping: a batch is only added while the interval is still too wide
+        while self.trajectories < max_trajectories:
+            self.run_batch(min(trajectories, max_trajectories - self.trajectories))
+            low, high = self.confidence_interval()
+            if high - low <= width:
+                break
+        return self.report()
+
+    def report(self):
+        lengths = np.concatenate(self.session_lengths) if self.session_lengths else np.zeros(0)
+        drawdowns = np.concatenate(self.drawdowns) if self.drawdowns else np.zeros(0)
+        low, high = self.confidence_interval()
+        return {
+            "trajectories": self.trajectories,
+            "batches": self.batches,
+            "risk_of_ruin": self.ruined / self.trajectories if self.trajectories else 0.0,
+            "risk_of_ruin_ci95": [low, high],
+            "dealer_broke": self.dealer_broke / self.trajectories if self.trajectories else 0.0,
+            "unfinished": (self.trajectories - self.ruined - self.dealer_broke) / self.trajectories if self.trajectories else 0.0,
+            "median_session_length": float(np.median(lengths)) if len(lengths) else 0.0,
+            "drawdown_quantiles": {
+                str(q): float(value) for q, value in zip(DRAWDOWN_QUANTILES, np.quantile(drawdowns, DRAWDOWN_QUANTILES))
+            } if len(drawdowns) else {},
+        }
+
+
+
+def main():
+    # python ruin.py [BET] [WIDTH]
+    bet = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    width = float(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_WIDTH
+    report = RuinAnalyzer(FlatBetPolicy(bet), seed=2024).run(width)
+    for key, value in report.items():
+        print(f"{key}: {value}")
+
+
+
+if __name__ == "__main__":
+    main()
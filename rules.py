@@ -0,0 +1,367 @@
+"""
+Module: Rules
+Description: Table rules as one object instead of module constants: soft 17, deck count, which
+             totals may double, doubling after a split, how many hands splitting can make,
+             late surrender and the natural's payout. compile_rules folds a Rules into lookup
+             tables and the round's phases built around them, so no rule is re-checked per hand.
+             The defaults are the rules blackjack_refactor.py plays. python rules.py check plays
+             stacked rounds to confirm the payout, surrender and soft 17 rules settle correctly.
+"""
+
+
+
+import sys
+from fractions import Fraction
+
+from blackjack_refactor import (
+    D_STARTING_CHIPS,
+    DEALER_LIMIT,
+    DOUBLE_DOWN,
+    HIT,
+    MAX_DECKS,
+    MIN_DECKS,
+    P_STARTING_CHIPS,
+    SPADE,
+    SPLIT,
+    STAND,
+    SURRENDER,
+    TWENTYONE,
+    Card,
+    Dealer,
+    Deck,
+    Player,
+    hand_winner,
+)
+from simulation import FlatBettor, HeadlessGame, MimicDealerStrategy, RoundResult, keep_playing
+
+
+
+# Highest total any hand can reach: hard 21 plus one more ten
+MAX_TOTAL = 31
+# Enough hands to split every card in an eight-deck shoe, i.e. no limit
+UNLIMITED_HANDS = 52 * MAX_DECKS
+
+
+
+class Rules:
+    def __init__(self, hit_soft_17=False, decks=1, double_totals=(9, 10, 11), double_soft=False,
+                 double_first_two_only=False, double_after_split=True, max_hands=None,
+                 surrender=False, blackjack_payout=1.0):
+        if not MIN_DECKS <= decks <= MAX_DECKS:
+            raise ValueError(f"A shoe holds between {MIN_DECKS} and {MAX_DECKS} decks, not {decks}")
+        if any(not 2 <= total <= TWENTYONE for total in double_totals):
+            raise ValueError(f"Double totals must be between 2 and {TWENTYONE}, not {double_totals}")
+        if max_hands is not None and max_hands < 1:
+            raise ValueError(f"max_hands must be at least 1, not {max_hands}")
+        if blackjack_payout < 1:
+            raise ValueError(f"A natural pays at least even money, not {blackjack_payout}")
+        self.hit_soft_17 = hit_soft_17
+        self.decks = decks
+        self.double_totals = tuple(sorted(set(double_totals)))
+        # Soft means an ace still counted as 11. For totals up to 11 every hand holding an ace
+        # is soft, so the default matches Hand.can_double_down's no-aces rule
+        self.double_soft = double_soft
+        self.double_first_two_only = double_first_two_only
+        self.double_after_split = double_after_split
+        # Total hands a round may split into, None for as many as the bankroll allows
+        self.max_hands = max_hands
+        # Late surrender: give up half the bet on the first two cards, before any split. The
+        # dealer's natural is settled first, so surrendering against one still loses the whole bet
+        self.surrender = surrender
+        self.blackjack_payout = blackjack_payout
+
+    def to_dict(self):
+        return {
+            "hit_soft_17": self.hit_soft_17,
+            "decks": self.decks,
+            "double_totals": list(self.double_totals),
+            "double_soft": self.double_soft,
+            "double_first_two_only": self.double_first_two_only,
+            "double_after_split": self.double_after_split,
+            "max_hands": self.max_hands,
+            "surrender": self.surrender,
+            "blackjack_payout": self.blackjack_payout,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def __repr__(self):
+        return f"Rules({', '.join(f'{key}={value!r}' for key, value in self.to_dict().items())})"
+
+
+
+class CompiledRules:
+    def __init__(self, rules: Rules):
+        self.rules = rules
+        # dealer_stands[soft][total]
+        self.dealer_stands = [
+            [total >= DEALER_LIMIT for total in range(MAX_TOTAL + 1)],
+            [total > DEALER_LIMIT if rules.hit_soft_17 else total >= DEALER_LIMIT for total in range(MAX_TOTAL + 1)],
+        ]
+        # can_double[soft][total]
+        self.can_double = [
+            [total in rules.double_totals for total in range(MAX_TOTAL + 1)],
+            [total in rules.double_totals and rules.double_soft for total in range(MAX_TOTAL + 1)],
+        ]
+        self.max_hands = rules.max_hands or UNLIMITED_HANDS
+        # Exact, so 6:5 is 6/5 and not the nearest float
+        self.payout = Fraction(str(rules.blackjack_payout))
+        # choices[can_double][can_split][can_surrender], the same order Player.get_choices uses
+        self.choices = [[[
+            [HIT, STAND] + ([DOUBLE_DOWN] if double else []) + ([SPLIT] if split else []) + ([SURRENDER] if surrender else [])
+            for surrender in (False, True)] for split in (False, True)] for double in (False, True)]
+        self.player_turn, self.dealer_turn, self.end_round = compile_round(self)
+
+
+
+def compile_round(compiled: CompiledRules):
+    # Everything a round needs is bound here once, the phases below only index into it.
+    # They are RulesGame's player_turn, dealer_turn and end_round, so HeadlessGame.play_round,
+    # attach_profiler and any renderer see the same phases as in every other game
+    dealer_stands = compiled.dealer_stands
+    can_double = compiled.can_double
+    choices_table = compiled.choices
+    max_hands = compiled.max_hands
+    first_two_only = compiled.rules.double_first_two_only
+    double_after_split = compiled.rules.double_after_split
+    surrender_allowed = compiled.rules.surrender
+    payout = compiled.payout
+
+    def get_choices(player, hand, bet, split):
+        can_increase = player.can_increase_bet(bet)
+        double = (can_increase and can_double[hand.soft_aces > 0][hand.value]
+                  and (not first_two_only or len(hand.cards) == 2) and (double_after_split or not split))
+        pair = can_increase and hand.pair and len(player.hands) < max_hands
+        surrender = surrender_allowed and not split and len(hand.cards) == 2
+        return choices_table[double][pair][surrender]
+
+    def player_turn(game):
+        # Returns True when no hand is left for the dealer to play against
+        player = game.player
+        dealer_upcard = game.get_dealer_hand().cards[1]
+        current_hand = 0
+        while current_hand < len(player.hands):
+            hand = player.hands[current_hand]
+            bet = game.bets[current_hand]
+            if hand.value > TWENTYONE:
+                current_hand += 1
+                continue
+            choices = get_choices(player, hand, bet, len(player.hands) > 1)
+            choice = game.strategy.choose(hand, choices, dealer_upcard, bet)
+            if choice not in choices:
+                raise ValueError(f"Strategy chose {choice!r}, expected one of {choices}")
+            game.decisions.append(choice)
+
+            if choice == STAND:
+                current_hand += 1
+            elif choice == HIT:
+                player.deal_card(game.deck, current_hand)
+            elif choice == DOUBLE_DOWN:
+                game.bets[current_hand] = bet * 2
+                player.deal_card(game.deck, current_hand)
+                current_hand += 1
+            elif choice == SPLIT:
+                game.bets.append(bet)
+                player.split_hand(game.deck, current_hand)
+            elif choice == SURRENDER:
+                game.surrendered.add(current_hand)
+                current_hand += 1
+            if choice not in (STAND, SURRENDER):
+                game.print_all_hands()
+
+        return not any(hand.value <= TWENTYONE and index not in game.surrendered
+                       for index, hand in enumerate(player.hands))
+
+    def dealer_turn(game):
+        dealer_hand = game.get_dealer_hand()
+        game.dealer.reveal_hole_card(game.deck)
+        game.print_all_hands()
+        while not dealer_stands[dealer_hand.soft_aces > 0][dealer_hand.value]:
+            game.dealer.deal_card(game.deck)
+            game.print_all_hands()
+
+    def end_round(game):
+        player = game.player
+        dealer_hand = game.get_dealer_hand()
+        starting_money = player.money
+        hand_nets = []
+        for index, hand in enumerate(player.hands):
+            bet = game.bets[index]
+            if index in game.surrendered and game.dealer_start_value == TWENTYONE:
+                # Late surrender comes after the dealer checks for a natural, which takes the whole bet
+                winner = "dealer"
+                amount = bet
+            elif index in game.surrendered:
+                # Half the bet back, rounded in the house's favour
+                winner = "surrender"
+                amount = bet - bet // 2
+            elif game.natural:
+                # A natural ends the round before the dealer draws, like HeadlessGame. Chips are
+                # whole, so a payout that isn't (3:2 on an odd bet) is rounded in the house's favour
+                winner = hand_winner(hand.value, game.dealer_start_value)
+                amount = int(bet * payout) if winner == "player" else bet
+            else:
+                winner = hand_winner(hand.value, dealer_hand.value)
+                amount = bet
+            game.hand_winners.append(winner)
+            if winner == "player":
+                player.win_bet(amount)
+                game.dealer.lose_bet(amount)
+                hand_nets.append(amount)
+            elif winner in ("dealer", "surrender"):
+                player.lose_bet(amount)
+                game.dealer.win_bet(amount)
+                hand_nets.append(-amount)
+            else:
+                hand_nets.append(0)
+
+        result = RoundResult(
+            bets=list(game.bets),
+            outcomes=list(game.hand_winners),
+            player_values=[hand.value for hand in player.hands],
+            dealer_value=dealer_hand.value,
+            blackjack=game.natural,
+            decisions=list(game.decisions),
+            net=player.money - starting_money,
+            player_money=player.money,
+            dealer_money=game.dealer.money,
+            dealer_cards=[(card.value, card.suit) for card in dealer_hand.cards],
+            player_cards=[[(card.value, card.suit) for card in hand.cards] for hand in player.hands],
+            bet=game.bet,
+            hand_nets=hand_nets,
+        )
+        for current_hand in range(len(player.hands)):
+            player.discard_cards(game.deck, current_hand)
+        game.dealer.discard_cards(game.deck)
+        return result
+
+    return player_turn, dealer_turn, end_round
+
+
+COMPILED = {}
+
+
+def compile_rules(rules: Rules) -> CompiledRules:
+    # Rule sets are compiled once per process however many games use them
+    key = repr(rules)
+    if key not in COMPILED:
+        COMPILED[key] = CompiledRules(rules)
+    return COMPILED[key]
+
+
+
+class RulesGame(HeadlessGame):
+    def __init__(self, dealer: Dealer, player: Player, deck: Deck, strategy, bettor, rules: Rules,
+                 play_again=keep_playing, renderer=None):
+        super().__init__(dealer, player, deck, strategy, bettor, play_again, renderer)
+        self.rules = rules
+        self.compiled = compile_rules(rules)
+        self.surrendered = set()
+        self.dealer_start_value = 0
+
+    # HeadlessGame.play_round runs these phases, each one a compiled closure
+
+    def start_round(self):
+        self.surrendered = set()
+        super().start_round()
+        self.dealer_start_value = self.get_dealer_hand().value
+
+    def player_turn(self):
+        return self.compiled.player_turn(self)
+
+    def dealer_turn(self):
+        self.compiled.dealer_turn(self)
+
+    def end_round(self):
+        return self.compiled.end_round(self)
+
+
+
+def new_rules_game(rules=None, strategy=None, bettor=None, play_again=keep_playing,
+                   player_money=P_STARTING_CHIPS, dealer_money=D_STARTING_CHIPS,
+                   penetration=1.0, rng=None, renderer=None):
+    rules = rules or Rules()
+    return RulesGame(
+        Dealer(dealer_money),
+        Player(player_money),
+        Deck(rules.decks, penetration, verbose=False, rng=rng),
+        strategy or MimicDealerStrategy(),
+        bettor or FlatBettor(),
+        rules,
+        play_again,
+        renderer,
+    )
+
+
+
+class StackedChoices:
+    # Makes the given decisions in order, for rounds dealt from a stacked shoe
+    def __init__(self, decisions):
+        self.decisions = list(decisions)
+
+    def choose(self, hand, choices, dealer_upcard, bet):
+        return self.decisions.pop(0)
+
+
+def play_stacked(rules, cards, decisions=(), bet=2, player_money=100):
+    # Cards are dealt in order: dealer's hole card, dealer's upcard, the player's two, then draws
+    game = new_rules_game(rules, StackedChoices(decisions), FlatBettor(bet), player_money=player_money)
+    game.deck.cards[:0] = [Card(value, SPADE) for value in cards]
+    game.deck.position = 0
+    return game.play_round()
+
+
+def expect(name, actual, expected):
+    if actual != expected:
+        raise AssertionError(f"{name}: expected {expected!r}, got {actual!r}")
+
+
+def check():
+    three_to_two = Rules(blackjack_payout=1.5)
+    result = play_stacked(three_to_two, ["10", "7", "A", "K"])
+    expect("3:2 natural on 2 chips", (result.net, result.hand_nets), (3, [3]))
+    result = play_stacked(three_to_two, ["10", "7", "A", "K"], bet=1)
+    expect("3:2 natural on 1 chip", (result.net, result.hand_nets), (1, [1]))
+    # FlatBettor bets what's left once the bankroll runs low, which must still settle
+    result = play_stacked(three_to_two, ["10", "7", "A", "K"], player_money=1)
+    expect("3:2 natural on the last chip", result.player_money, 2)
+
+    surrender = Rules(surrender=True)
+    result = play_stacked(surrender, ["10", "7", "10", "6"], [SURRENDER])
+    expect("surrender", (result.outcomes, result.net, result.hand_nets), (["surrender"], -1, [-1]))
+    result = play_stacked(surrender, ["A", "K", "10", "6"], [SURRENDER])
+    expect("surrender into a natural", (result.outcomes, result.net, result.hand_nets), (["dealer"], -2, [-2]))
+
+    # Dealer holds A, 6 and the next card is a 2
+    result = play_stacked(Rules(), ["A", "6", "10", "8", "2"], [STAND])
+    expect("S17 stands on soft 17", (result.dealer_value, result.net), (17, 2))
+    result = play_stacked(Rules(hit_soft_17=True), ["A", "6", "10", "8", "2"], [STAND])
+    expect("H17 hits soft 17", (result.dealer_value, result.net), (19, -2))
+    print("All rule checks passed")
+
+
+
+def main():
+    # python rules.py [ROUNDS]: the house rules against a common six-deck game, two-chip
+    # bets so a 3:2 natural pays exactly. python rules.py check runs the rule checks instead
+    if len(sys.argv) > 1 and sys.argv[1] == "check":
+        check()
+        return
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rule_sets = {
+        "house": Rules(),
+        "6D H17 3:2": Rules(hit_soft_17=True, decks=6, double_totals=range(2, 22), double_first_two_only=True,
+                            max_hands=4, surrender=True, blackjack_payout=1.5),
+    }
+    for name, rules in rule_sets.items():
+        game = new_rules_game(rules, bettor=FlatBettor(2), player_money=10 ** 12, dealer_money=10 ** 12,
+                              penetration=0.75)
+        net = sum(result.net for result in game.run(rounds))
+        print(f"{name}: {net / rounds / 2:+.4f} per unit bet over {rounds} rounds")
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Module: Server
+Description: Hosts many blackjack tables on one asyncio event loop. Every TCP connection gets its
+             own Deck, Dealer and Player, and plays the same rounds as the terminal game with
+             the same prompts, one line of input per answer. Try it with: nc localhost 8021
+             Each table's shoe has its own seed, and its SessionLog is saved to the log directory
+             when the connection closes, so replay.py can reproduce any hand.
+"""
+
+
+
+import asyncio
+import os
+import sys
+
+from blackjack_refactor import (
+    CHOICE_PROMPTS,
+    D_STARTING_CHIPS,
+    INSTRUCTIONS,
+    P_STARTING_CHIPS,
+    SESSION_LOG_DIR,
+    Dealer,
+    Game,
+    Hand,
+    Player,
+    TableRenderer,
+    new_session,
+)
+
+
+
+HOST = "127.0.0.1"
+PORT = 8021
+# A table that hasn't answered in this long is closed
+IDLE_TIMEOUT = 600
+# Pending connections the listening socket will queue while tables are being opened
+BACKLOG = 4096
+
+
+
+class StreamOut:
+    # Lets a TableRenderer write to a connection, the game drains it before waiting on input
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+
+    def write(self, text):
+        self.writer.write(text.encode())
+
+    def flush(self):
+        pass
+
+
+
+class AsyncGame(Game):
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, deck=None):
+        # A deck passed in has no known seed, so only tables with their own shoe are logged
+        log = None
+        if deck is None:
+            deck, log = new_session(verbose=False)
+        super().__init__(
+            Dealer(D_STARTING_CHIPS),
+            Player(P_STARTING_CHIPS),
+            deck,
+            None,
+            TableRenderer(StreamOut(writer)),
+            log,
+        )
+        self.reader = reader
+        self.writer = writer
+        # No "Press ENTER" pause over the wire, the dealer just plays out
+        self.dealer_pause = None
+
+    async def ask(self, prompt):
+        self.renderer.message(prompt, end="")
+        await self.writer.drain()
+        line = await asyncio.wait_for(self.reader.readline(), IDLE_TIMEOUT)
+        if not line:
+            raise ConnectionResetError("Player left the table")
+        return line.decode(errors="replace").strip().lower()
+
+    async def get_bet(self):
+        while True:
+            try:
+                bet = int(await self.ask(f"How much would you like to bet? (1 - {self.player.money}) "))
+                if 0 < bet <= self.player.money:
+                    return bet
+                else:
+                    raise ValueError()
+            except ValueError:
+                self.renderer.message(f"Please input a bet between 0 and {self.player.money}")
+
+    async def take_turn(self, hand: Hand, bet):
+        choices = self.player.get_choices(hand, bet)
+        prompt = CHOICE_PROMPTS[tuple(choices)]
+        while True:
+            choice = await self.ask(prompt)
+            if choice in choices:
+                return choice
+            self.renderer.message("Please input one of the letters in parentheses.")
+
+    async def set_play_again(self):
+        while True:
+            play = await self.ask("Play again? (y/n) ")
+            if play in ["n", "y"]:
+                self.play_again = play == "y"
+                return
+            self.renderer.message("Please type either y or n.")
+
+    async def start_round(self):
+        if self.deck.needs_shuffle():
+            self.deck.shuffle()
+        self.bet = await self.get_bet()
+        self.opening_bet = self.bet
+        self.decisions = []
+        self.hand_winners = []
+        self.dealer.start_new_hand(self.deck)
+        self.player.start_new_hand(self.deck)
+        self.print_all_hands()
+
+    async def player_turn(self):
+        # Game's own turn, waiting on the connection instead of input() for each decision
+        steps = self.player_turn_steps()
+        try:
+            hand = next(steps)
+            while True:
+                hand = steps.send(await self.take_turn(hand, self.bet))
+        except StopIteration as finished:
+            return finished.value
+
+    async def dealer_turn(self):
+        super().dealer_turn()
+
+    async def end_round(self):
+        self.settle_hands()
+
+        if self.is_bankrupt():
+            self.play_again = False
+            return
+
+        await self.set_play_again()
+
+    async def play(self):
+        # Round loop from blackjack_refactor.main
+        self.renderer.message(INSTRUCTIONS)
+        self.print_money()
+
+        while self.play_again:
+            await self.start_round()
+
+            if self.player.hands[0].blackjack():
+                self.renderer.message("BLACKJACK!")
+                await self.end_round()
+                continue
+
+            player_busted = await self.player_turn()
+
+            if self.is_bankrupt():
+                await self.end_round()
+                break
+
+            if player_busted:
+                await self.end_round()
+                continue
+
+            await self.dealer_turn()
+
+            if self.get_dealer_hand().bust():
+                self.renderer.message("The dealer BUSTED!")
+
+            await self.end_round()
+
+            if self.is_bankrupt():
+                break
+
+        self.end_game()
+        await self.writer.drain()
+
+
+
+class TableServer:
+    def __init__(self, host=HOST, port=PORT, log_dir=None):
+        # Without a log_dir the tables' session logs are dropped when they close
+        self.host = host
+        self.port = port
+        self.log_dir = log_dir
+        self.tables = set()
+        self.tables_played = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        game = AsyncGame(reader, writer)
+        self.tables.add(game)
+        self.tables_played += 1
+        table = self.tables_played
+        try:
+            await game.play()
+        except (ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.tables.discard(game)
+            if self.log_dir and game.log.rounds:
+                game.log.save(os.path.join(self.log_dir, f"table-{table}-{game.log.seed}.json"))
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def serve(self):
+        server = await asyncio.start_server(self.handle, self.host, self.port, backlog=BACKLOG)
+        print(f"Dealing blackjack on {self.host}:{self.port}")
+        async with server:
+            await server.serve_forever()
+
+
+
+def main():
+    # python server.py [PORT] [LOG_DIR]
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else PORT
+    log_dir = sys.argv[2] if len(sys.argv) > 2 else SESSION_LOG_DIR
+    os.makedirs(log_dir, exist_ok=True)
+    try:
+        asyncio.run(TableServer(port=port, log_dir=log_dir).serve())
+    except KeyboardInterrupt:
+        pass
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Module: Simulation
+Description: Headless round runner for the refactored blackjack engine. Decisions, bets and
+             "play again" come from strategy objects instead of input(), and nothing is printed.
+"""
+
+
+
+from blackjack_refactor import (
+    Dealer,
+    Deck,
+    Game,
+    Hand,
+    Player,
+    TableRenderer,
+    D_STARTING_CHIPS,
+    DEALER_LIMIT,
+    DOUBLE_DOWN,
+    HIT,
+    P_STARTING_CHIPS,
+    SPLIT,
+    STAND,
+)
+
+
+
+class MimicDealerStrategy:
+    # Plays every hand like the dealer: hit below DEALER_LIMIT, never double or split
+    def choose(self, hand: Hand, choices, dealer_upcard, bet):
+        if hand.value < DEALER_LIMIT:
+            return HIT
+        return STAND
+
+
+
+class FlatBettor:
+    def __init__(self, amount=1):
+        self.amount = amount
+
+    def get_bet(self, player: Player):
+        # Never bet more than the player has left
+        return min(self.amount, player.money)
+
+
+
+def keep_playing(game, result):
+    # Default play-again rule: keep going until somebody is bankrupt
+    return not game.is_bankrupt()
+
+
+def always_play(game, result):
+    return True
+
+
+
+class RoundResult:
+    def __init__(self, bets, outcomes, player_values, dealer_value, blackjack, decisions,
+                 net, player_money, dealer_money, dealer_cards=None, player_cards=None, bet=None, hand_nets=None):
+        # bet is the opening wager, bets what each hand ended up staking after doubles and splits
+        self.bet = bet if bet is not None else (bets[0] if bets else 0)
+        self.bets = bets
+        self.outcomes = outcomes
+        self.player_values = player_values
+        self.dealer_value = dealer_value
+        self.blackjack = blackjack
+        self.decisions = decisions
+        self.net = net
+        # What each hand won or lost, even money unless a rule set paid it differently
+        self.hand_nets = hand_nets if hand_nets is not None else [
+            bet if outcome == "player" else -bet if outcome == "dealer" else 0 for outcome, bet in zip(outcomes, bets)
+        ]
+        self.player_money = player_money
+        self.dealer_money = dealer_money
+        # (value, suit) pairs: the dealer's in deal order, the player's one list per hand
+        self.dealer_cards = dealer_cards or []
+        self.player_cards = player_cards or []
+
+    def __repr__(self):
+        return (f"RoundResult(bets={self.bets}, outcomes={self.outcomes}, "
+                f"player_values={self.player_values}, dealer_value={self.dealer_value}, "
+                f"net={self.net})")
+
+
+
+class HeadlessGame(Game):
+    def __init__(self, dealer: Dealer, player: Player, deck: Deck, strategy, bettor, play_again=keep_playing,
+                 renderer=None):
+        # Silent unless someone passes a renderer to watch the table with
+        super().__init__(dealer, player, deck, None, renderer or TableRenderer(silent=True))
+        self.strategy = strategy
+        self.bettor = bettor
+        self.play_again_rule = play_again
+        self.dealer_pause = None
+        self.bets = []
+        self.decisions = []
+        self.natural = False
+
+    def get_bet(self):
+        return self.bettor.get_bet(self.player)
+
+    def start_round(self):
+        # A counting bettor has to see the count reset by a new shoe before it sizes the bet
+        if self.deck.needs_shuffle():
+            self.deck.shuffle()
+        self.bet = self.get_bet()
+        self.bets = [self.bet]
+        self.decisions = []
+        self.hand_winners = []
+        self.dealer.start_new_hand(self.deck)
+        self.player.start_new_hand(self.deck)
+        self.natural = self.player.hands[0].blackjack()
+        self.print_all_hands()
+
+    def player_turn(self):
+        # Same flow as Game.player_turn, but every hand keeps its own bet so
+        # doubling one split hand doesn't double the others
+        dealer_upcard = self.get_dealer_hand().cards[1]
+        current_hand = 0
+        while current_hand < len(self.player.hands):
+            hand = self.player.hands[current_hand]
+            bet = self.bets[current_hand]
+            if hand.bust():
+                current_hand += 1
+                continue
+
+            choices = self.player.get_choices(hand, bet)
+            choice = self.strategy.choose(hand, choices, dealer_upcard, bet)
+            if choice not in choices:
+                raise ValueError(f"Strategy chose {choice!r}, expected one of {choices}")
+            self.decisions.append(choice)
+
+            if choice == STAND:
+                current_hand += 1
+            elif choice == HIT:
+                self.player.deal_card(self.deck, current_hand)
+            elif choice == DOUBLE_DOWN:
+                self.bets[current_hand] = bet * 2
+                self.player.deal_card(self.deck, current_hand)
+                current_hand += 1
+            elif choice == SPLIT:
+                self.bets.append(bet)
+                self.player.split_hand(self.deck, current_hand)
+            if choice != STAND:
+                self.print_all_hands()
+
+        return all(hand.bust() for hand in self.player.hands)
+
+    def update_money(self, current_hand_idx):
+        hand_winner = self.hand_winners[current_hand_idx]
+        bet = self.bets[current_hand_idx]
+        if hand_winner == "player":
+            self.player.win_bet(bet)
+            self.dealer.lose_bet(bet)
+        elif hand_winner == "dealer":
+            self.player.lose_bet(bet)
+            self.dealer.win_bet(bet)
+
+    def end_round(self):
+        starting_money = self.player.money
+        for current_hand in range(len(self.player.hands)):
+            self.set_hand_winners(current_hand)
+            self.update_money(current_hand)
+
+        result = RoundResult(
+            bets=list(self.bets),
+            outcomes=list(self.hand_winners),
+            player_values=[hand.value for hand in self.player.hands],
+            dealer_value=self.get_dealer_hand().value,
+            blackjack=self.natural,
+            decisions=list(self.decisions),
+            net=self.player.money - starting_money,
+            player_money=self.player.money,
+            dealer_money=self.dealer.money,
+            dealer_cards=[(card.value, card.suit) for card in self.get_dealer_hand().cards],
+            player_cards=[[(card.value, card.suit) for card in hand.cards] for hand in self.player.hands],
+            bet=self.bet,
+        )
+
+        for current_hand in range(len(self.player.hands)):
+            self.player.discard_cards(self.deck, current_hand)
+        self.dealer.discard_cards(self.deck)
+        return result
+
+    def play_round(self) -> RoundResult:
+        self.start_round()
+        # Blackjack only works on the first hand, and ends the round straight away
+        if not self.natural:
+            player_busted = self.player_turn()
+            if not player_busted:
+                self.dealer_turn()
+        result = self.end_round()
+        self.play_again = self.play_again_rule(self, result)
+        return result
+
+    def run(self, rounds):
+        # Yields one RoundResult per round so callers never have to hold the whole run
+        for _ in range(rounds):
+            if not self.play_again or self.is_bankrupt():
+                return
+            yield self.play_round()
+
+
+
+def new_headless_game(strategy=None, bettor=None, play_again=keep_playing,
+                      player_money=P_STARTING_CHIPS, dealer_money=D_STARTING_CHIPS,
+                      decks=1, penetration=1.0, rng=None, renderer=None):
+    return HeadlessGame(
+        Dealer(dealer_money),
+        Player(player_money),
+        Deck(decks, penetration, verbose=False, rng=rng),
+        strategy or MimicDealerStrategy(),
+        bettor or FlatBettor(),
+        play_again,
+        renderer,
+    )
+
+
+
+def main():
+    game = new_headless_game(bettor=FlatBettor(10))
+    rounds = 0
+    for result in game.run(1000):
+        rounds += 1
+    print(f"Played {rounds} rounds.")
+    game.print_money()
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Module: Stats
+Description: Constant-memory statistics for long simulations. Rounds are fed in one at a time and
+             only running totals are kept: Welford mean and variance, outcome counts and a
+             fixed-bin bankroll histogram. Aggregators from separate workers can be merged.
+"""
+
+
+
+import math
+
+
+
+# 95% two-sided normal quantile
+Z_95 = 1.959963984540054
+OUTCOME_NAMES = {"player": "wins", "dealer": "losses", None: "pushes", "surrender": "surrenders"}
+
+
+
+class RunningMoments:
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def add(self, value):
+        # Welford's update, stable even over billions of values
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+
+    def merge(self, other):
+        # Chan et al. pairwise combination of two sets of moments
+        if not other.count:
+            return self
+        if not self.count:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.minimum, self.maximum = other.minimum, other.maximum
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        return self
+
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def standard_error(self):
+        return math.sqrt(self.variance() / self.count) if self.count else 0.0
+
+    def confidence_interval(self, z=Z_95):
+        margin = z * self.standard_error()
+        return self.mean - margin, self.mean + margin
+
+    def to_dict(self):
+        low, high = self.confidence_interval()
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "variance": self.variance(),
+            "std_dev": math.sqrt(self.variance()),
+            "ci95": [low, high],
+            "min": self.minimum if self.count else None,
+            "max": self.maximum if self.count else None,
+        }
+
+
+
+class FixedHistogram:
+    def __init__(self, low, high, bins):
+        if high <= low or bins < 1:
+            raise ValueError(f"Histogram needs high > low and at least one bin, got {low}, {high}, {bins}")
+        self.low = low
+        self.high = high
+        self.bins = bins
+        self.width = (high - low) / bins
+        self.counts = [0] * bins
+        self.underflow = 0
+        self.overflow = 0
+
+    def add(self, value):
+        if value < self.low:
+            self.underflow += 1
+        elif value >= self.high:
+            self.overflow += 1
+        else:
+            self.counts[min(int((value - self.low) / self.width), self.bins - 1)] += 1
+
+    def merge(self, other):
+        if (self.low, self.high, self.bins) != (other.low, other.high, other.bins):
+            raise ValueError("Can only merge histograms with the same bins")
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, other.counts)]
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        return self
+
+    def to_dict(self):
+        return {
+            "low": self.low,
+            "high": self.high,
+            "bins": self.bins,
+            "counts": list(self.counts),
+            "underflow": self.underflow,
+            "overflow": self.overflow,
+        }
+
+
+
+class StreamingStats:
+    def __init__(self, bankroll_low=0, bankroll_high=10000, bankroll_bins=100):
+        self.rounds = 0
+        self.hands = 0
+        self.outcomes = {name: 0 for name in OUTCOME_NAMES.values()}
+        self.blackjacks = 0
+        self.wagered = 0
+        self.net = 0
+        self.round_net = RunningMoments()
+        self.hand_net = RunningMoments()
+        self.bet_size = RunningMoments()
+        self.bankroll = FixedHistogram(bankroll_low, bankroll_high, bankroll_bins)
+
+    def add_round(self, outcomes, bets, net, bankroll=None, blackjack=False, hand_nets=None):
+        # outcomes are Game.hand_winners entries, bets the stake on each of those hands and
+        # hand_nets what each hand won or lost, even money when not given
+        self.rounds += 1
+        self.hands += len(outcomes)
+        if hand_nets is None:
+            hand_nets = [bet if outcome == "player" else -bet if outcome == "dealer" else 0
+                         for outcome, bet in zip(outcomes, bets)]
+        for outcome, bet, hand_net in zip(outcomes, bets, hand_nets):
+            self.outcomes[OUTCOME_NAMES[outcome]] += 1
+            self.bet_size.add(bet)
+            self.hand_net.add(hand_net)
+        self.blackjacks += blackjack
+        self.wagered += sum(bets)
+        self.net += net
+        self.round_net.add(net)
+        if bankroll is not None:
+            self.bankroll.add(bankroll)
+
+    def add(self, result):
+        # Takes a simulation.RoundResult
+        self.add_round(result.outcomes, result.bets, result.net, result.player_money, result.blackjack,
+                       result.hand_nets)
+
+    def merge(self, other):
+        self.rounds += other.rounds
+        self.hands += other.hands
+        for name, count in other.outcomes.items():
+            self.outcomes[name] += count
+        self.blackjacks += other.blackjacks
+        self.wagered += other.wagered
+        self.net += other.net
+        self.round_net.merge(other.round_net)
+        self.hand_net.merge(other.hand_net)
+        self.bet_size.merge(other.bet_size)
+        self.bankroll.merge(other.bankroll)
+        return self
+
+    def frequencies(self):
+        hands = self.hands or 1
+        return {name: count / hands for name, count in self.outcomes.items()}
+
+    def report(self):
+        return {
+            "rounds": self.rounds,
+            "hands": self.hands,
+            **self.outcomes,
+            "blackjacks": self.blackjacks,
+            "wagered": self.wagered,
+            "net": self.net,
+            "ev_per_round": self.round_net.mean,
+            "variance_per_round": self.round_net.variance(),
+            "ev_per_round_ci95": list(self.round_net.confidence_interval()),
+            "ev_per_unit_wagered": self.net / self.wagered if self.wagered else 0.0,
+            "frequencies": self.frequencies(),
+            "hand_net": self.hand_net.to_dict(),
+            "bet_size": self.bet_size.to_dict(),
+            "bankroll_histogram": self.bankroll.to_dict(),
+        }
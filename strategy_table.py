@@ -0,0 +1,162 @@
+"""
+Module: Strategy Table
+Description: Basic strategy compiled into one flat list, so an automated decision is a single
+             indexed lookup. Tables are built from the expected value solver or from a chart,
+             and can be used as a headless strategy or through BotPlayer in the normal Game.
+"""
+
+
+
+import json
+
+from blackjack_refactor import DOUBLE_DOWN, HIT, SPADE, SPLIT, STAND, TWENTYONE, Card, Hand, Player
+from expected_value import action_evs
+from probability import RANK_INDEX, RANKS, full_composition, remove_cards
+
+
+
+# Index sizes: hand value 0-21, hard or soft, pair rank (0 when the hand can't split),
+# dealer upcard rank, and whether doubling is allowed
+VALUE_SLOTS = TWENTYONE + 1
+SOFT_SLOTS = 2
+PAIR_SLOTS = len(RANKS) + 1
+UPCARD_SLOTS = len(RANKS)
+DOUBLE_SLOTS = 2
+TABLE_SIZE = VALUE_SLOTS * SOFT_SLOTS * PAIR_SLOTS * UPCARD_SLOTS * DOUBLE_SLOTS
+HARD = "hard"
+SOFT = "soft"
+PAIR = "pair"
+# Hands under this total hit when a table has no entry for them, everything else stands
+DEFAULT_STAND = 12
+
+
+
+def table_index(value, soft, pair_rank, upcard_rank, can_double):
+    return (((value * SOFT_SLOTS + soft) * PAIR_SLOTS + pair_rank) * UPCARD_SLOTS + upcard_rank) * DOUBLE_SLOTS + can_double
+
+
+def build_hand(card_values):
+    hand = Hand()
+    for value in card_values:
+        hand.add_card(Card(value, SPADE, False))
+    return hand
+
+
+def representative_hand(kind, number):
+    # Card values standing in for every hand of that kind and total (or pair rank)
+    if kind == PAIR:
+        return [RANKS[number - 1]] * 2
+    if kind == SOFT:
+        return ["A", RANKS[number - 12]]
+    if number == TWENTYONE:
+        return ["10", "5", "6"]
+    if number == 20:
+        return ["10", "K"]
+    if number >= 12:
+        return ["10", RANKS[number - 11]]
+    return ["2", RANKS[number - 3]]
+
+
+def legal_moves(pair_rank, can_double):
+    moves = [HIT, STAND]
+    if can_double:
+        moves.append(DOUBLE_DOWN)
+    if pair_rank:
+        moves.append(SPLIT)
+    return moves
+
+
+
+class StrategyTable:
+    def __init__(self, table=None):
+        if table is None:
+            table = [None] * TABLE_SIZE
+            for value in range(VALUE_SLOTS):
+                start = table_index(value, 0, 0, 0, 0)
+                end = table_index(value + 1, 0, 0, 0, 0)
+                table[start:end] = [HIT if value < DEFAULT_STAND else STAND] * (end - start)
+        self.table = table
+
+    @classmethod
+    def from_solver(cls, decks=1):
+        # Best move for each entry, solved against a fresh shoe of the given size
+        strategy = cls()
+        shoe = full_composition(decks)
+        hands = [(HARD, value) for value in range(4, TWENTYONE + 1)]
+        hands += [(SOFT, value) for value in range(12, TWENTYONE + 1)]
+        hands += [(PAIR, rank) for rank in range(1, PAIR_SLOTS)]
+        for kind, number in hands:
+            cards = representative_hand(kind, number)
+            hand = build_hand(cards)
+            pair_rank = number if kind == PAIR else 0
+            for upcard_rank, upcard in enumerate(RANKS):
+                # A natural never reaches the strategy, this soft 21 is one built by drawing
+                evs = action_evs(cards, upcard, remove_cards(shoe, cards + [upcard]), natural=False)
+                for can_double in (0, 1):
+                    moves = [move for move in legal_moves(pair_rank, can_double) if move in evs]
+                    best = max(moves, key=lambda move: evs[move])
+                    strategy.set(hand.value, hand.is_soft(), pair_rank, upcard_rank, can_double, best)
+        return strategy
+
+    @classmethod
+    def from_chart(cls, chart):
+        # chart maps (kind, number, upcard) to moves in order of preference, so
+        # ("hard", 11, "6"): "d/h" means double down if allowed, otherwise hit.
+        # kind is "hard", "soft" or "pair", number is the total or the pair's card value
+        strategy = cls()
+        for (kind, number, upcard), preferences in chart.items():
+            preferences = preferences.split("/")
+            if kind == PAIR:
+                pair_rank = RANK_INDEX[number] + 1
+                hand = build_hand([number, number])
+                value, soft = hand.value, hand.is_soft()
+            else:
+                pair_rank = 0
+                value, soft = number, kind == SOFT
+            for can_double in (0, 1):
+                moves = legal_moves(pair_rank, can_double)
+                move = next((move for move in preferences if move in moves), None)
+                if move is None:
+                    raise ValueError(f"None of {preferences} is allowed for {kind} {number} vs {upcard}")
+                strategy.set(value, soft, pair_rank, RANK_INDEX[upcard], can_double, move)
+        return strategy
+
+    @classmethod
+    def load(cls, path):
+        # Solving takes a while, so compiled tables can be saved and reused
+        with open(path) as file:
+            table = json.load(file)
+        if len(table) != TABLE_SIZE:
+            raise ValueError(f"{path} has {len(table)} entries, expected {TABLE_SIZE}")
+        return cls(table)
+
+    def save(self, path):
+        with open(path, "w") as file:
+            json.dump(self.table, file)
+
+    def set(self, value, soft, pair_rank, upcard_rank, can_double, move):
+        self.table[table_index(value, int(soft), pair_rank, upcard_rank, int(can_double))] = move
+
+    def lookup(self, hand: Hand, upcard_value, can_double, can_split):
+        pair_rank = RANK_INDEX[hand.cards[0].value] + 1 if can_split else 0
+        soft = 1 if hand.soft_aces else 0
+        return self.table[table_index(hand.value, soft, pair_rank, RANK_INDEX[upcard_value], int(can_double))]
+
+    def choose(self, hand: Hand, choices, dealer_upcard, bet):
+        # Headless strategy interface, see simulation.HeadlessGame
+        return self.lookup(hand, dealer_upcard.value, DOUBLE_DOWN in choices, SPLIT in choices)
+
+
+
+class BotPlayer(Player):
+    def __init__(self, money, strategy: StrategyTable, dealer):
+        super().__init__(money)
+        self.strategy = strategy
+        self.dealer = dealer
+
+    def take_turn(self, hand: Hand, bet):
+        # Drop-in for Player.take_turn: one lookup instead of a prompt
+        can_increase = self.can_increase_bet(bet)
+        can_double = can_increase and hand.can_double_down()
+        can_split = can_increase and hand.is_pair()
+        return self.strategy.lookup(hand, self.dealer.hands[0].cards[1].value, can_double, can_split)